@@ -0,0 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+
+from .unread import unread_count
+
+
+def unread_notifications(request):
+    """`unread_notification_count` for the inbox badge; looked up only if a template uses it."""
+    user = getattr(request, 'user', None)
+    return {'unread_notification_count': SimpleLazyObject(lambda: unread_count(user))}
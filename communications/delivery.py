@@ -0,0 +1,177 @@
+# communications/delivery.py
+"""
+Announcement delivery queue.
+
+Announcements are created in the PENDING state and delivered by the
+`deliver_announcements` management command. The worker walks the course's
+enrolled students in student id order, CHUNK_SIZE at a time:
+
+1. one keyset query for the next chunk of (student id, email)
+2. one bulk_create for their in-app notifications (PUSH delivery only; FEED
+   announcements reach inboxes at read time, see communications/feed.py) and
+   one UPDATE of their unread counters, committed together with the
+   announcement's progress (`notified_count`, `last_student_id`)
+3. the email, as BCC batches of MAIL_BATCH_SIZE recipients, all sent over a
+   single SMTP connection kept open for the whole announcement (students on
+   an hourly/daily digest are left out; their digest carries it, see
+   communications/digests.py)
+
+Instructors follow `status` and the counters on the announcement status
+page. A worker that dies mid-delivery leaves the announcement SENDING; the
+next run resumes after `last_student_id`, so no student gets a second
+notification (the email of the chunk in flight may be lost).
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from courses.models import Enrollment
+from .digests import PERIODS
+from . import unread
+from .models import Announcement, Notification
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+MAIL_BATCH_SIZE = 50
+# A SENDING announcement whose worker made no progress for this long is picked up again
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _chunk_size():
+    return getattr(settings, 'ANNOUNCEMENT_CHUNK_SIZE', CHUNK_SIZE)
+
+
+def _mail_batch_size():
+    return getattr(settings, 'ANNOUNCEMENT_MAIL_BATCH_SIZE', MAIL_BATCH_SIZE)
+
+
+def claim_announcement(announcement_id):
+    """Move a pending (or stale) announcement to SENDING. False if another worker has it."""
+    now = timezone.now()
+    return bool(
+        Announcement.objects.filter(pk=announcement_id)
+        .filter(Q(status=Announcement.PENDING) | Q(status=Announcement.SENDING, started_at__lt=now - STALE_AFTER))
+        .update(status=Announcement.SENDING, started_at=now)
+    )
+
+
+def _recipients(course_id, after_student_id, limit):
+    """(student id, email or None for digest users) of the next `limit` students."""
+    rows = (
+        Enrollment.objects.filter(course_id=course_id, student_id__gt=after_student_id)
+        .order_by('student_id')
+        .values_list('student_id', 'student__email', 'student__profile__email_digest')[:limit]
+    )
+    return [(student_id, None if digest in PERIODS else email) for student_id, email, digest in rows]
+
+
+def _send_mail(connection, announcement, emails):
+    """BCC batches over the open connection. Returns (sent, failed) recipient counts."""
+    subject = f"📢 {announcement.course.title}: {announcement.title}"
+    body = f"{announcement.content}\n\n- {announcement.instructor.username}"
+    sent = failed = 0
+    batch_size = _mail_batch_size()
+    for start in range(0, len(emails), batch_size):
+        batch = emails[start:start + batch_size]
+        message = EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, to=[], bcc=batch, connection=connection)
+        try:
+            message.send()
+            sent += len(batch)
+        except Exception:
+            logger.exception("Announcement %s: mail batch of %d failed", announcement.pk, len(batch))
+            failed += len(batch)
+    return sent, failed
+
+
+def deliver_announcement(announcement, chunk_size=None, progress=None):
+    """
+    Deliver a claimed announcement to every enrolled student. `progress`, if
+    given, is called with the announcement after each chunk.
+    """
+    chunk_size = chunk_size or _chunk_size()
+    course = announcement.course
+    message = f"New Announcement in {course.title}: {announcement.title}"[:255]
+    link = reverse('course-detail', kwargs={'pk': course.pk})
+
+    Announcement.objects.filter(pk=announcement.pk).update(
+        recipient_count=Enrollment.objects.filter(course=course).count()
+    )
+    announcement.refresh_from_db()
+
+    # One SMTP session for the whole announcement
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception:
+        logger.exception("Announcement %s: could not connect to the mail server", announcement.pk)
+
+    try:
+        while True:
+            recipients = _recipients(course.pk, announcement.last_student_id, chunk_size)
+            if not recipients:
+                break
+            last_student_id = recipients[-1][0]
+
+            with transaction.atomic():
+                # Feed announcements reach inboxes at read time (communications/feed.py)
+                if announcement.delivery == Announcement.PUSH:
+                    Notification.objects.bulk_create(
+                        [Notification(user_id=student_id, message=message, link=link) for student_id, _ in recipients]
+                    )
+                    unread.notifications_created([student_id for student_id, _ in recipients])
+                Announcement.objects.filter(pk=announcement.pk).update(
+                    notified_count=F('notified_count') + len(recipients),
+                    last_student_id=last_student_id,
+                    started_at=timezone.now(),  # heartbeat for the stale check
+                )
+
+            sent, failed = _send_mail(connection, announcement, [email for _, email in recipients if email])
+            Announcement.objects.filter(pk=announcement.pk).update(
+                emailed_count=F('emailed_count') + sent,
+                failed_email_count=F('failed_email_count') + failed,
+            )
+            announcement.refresh_from_db()
+            if progress:
+                progress(announcement)
+    except Exception as exc:
+        logger.exception("Announcement %s failed", announcement.pk)
+        Announcement.objects.filter(pk=announcement.pk).update(status=Announcement.FAILED, error=str(exc))
+        raise
+    finally:
+        connection.close()
+
+    Announcement.objects.filter(pk=announcement.pk).update(status=Announcement.SENT, finished_at=timezone.now(), error='')
+    announcement.refresh_from_db()
+    return announcement
+
+
+def deliver_pending_announcements(progress=None):
+    """
+    Deliver every queued announcement, oldest first.
+    Returns (delivered, failed) counts; (0, 0) means the queue is empty.
+    """
+    now = timezone.now()
+    queued = (
+        Announcement.objects
+        .filter(Q(status=Announcement.PENDING) | Q(status=Announcement.SENDING, started_at__lt=now - STALE_AFTER))
+        .order_by('created_at')
+        .values_list('pk', flat=True)
+    )
+    delivered = failed = 0
+    for announcement_id in list(queued):
+        if not claim_announcement(announcement_id):
+            continue
+        announcement = Announcement.objects.select_related('course', 'instructor').get(pk=announcement_id)
+        try:
+            deliver_announcement(announcement, progress=progress)
+            delivered += 1
+        except Exception:
+            failed += 1
+    return delivered, failed
@@ -0,0 +1,263 @@
+# communications/digests.py
+"""
+Notification digests.
+
+Users whose Profile.email_digest is HOURLY or DAILY get no email per event.
+Their unread notifications (and the course feed announcements posted for
+them, see communications/feed.py) are bundled into one email per window by
+the `send_digests` command, run from cron once per period.
+
+A run walks the users due for a digest in user id order, DIGEST_BATCH_SIZE at
+a time, and hands each batch to a pool of worker threads (the work is
+database-bound). SQLite allows one writer at a time and fails concurrent
+writers with "database table is locked", so there (and with one worker)
+batches run one after another in the calling thread. A batch costs a fixed number of queries however many users
+and notifications it holds:
+
+1. the batch's users (name and email)
+2. their unread notifications in the window, which starts at each user's
+   `digest_sent_at`; ordered by user and grouped in Python
+3. the feed announcements of their courses in the window, and their feed
+   cursors
+4. one INSERT of the digest emails into the outbox (communications/outbox.py)
+   and one UPDATE moving every user's `digest_sent_at` to the window end
+
+Both writes of step 4 commit together, and each email's dedup key names the user and the
+window, so a batch that is retried never queues a second digest.
+"""
+import logging
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import Profile
+from .models import Announcement, CourseFeedCursor, Notification
+from .outbox import enqueue_email, enqueue_emails, outgoing_email
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    Profile.HOURLY: timedelta(hours=1),
+    Profile.DAILY: timedelta(days=1),
+}
+BATCH_SIZE = 1000
+WORKERS = 4
+# Cron drift: a user whose last digest is this much short of a full period is still due
+DUE_SLACK = timedelta(minutes=5)
+# Items listed per email; the rest are summed up as "and N more"
+MAX_ITEMS = 20
+
+DigestItem = namedtuple('DigestItem', ['message', 'url', 'created_at'])
+DigestRun = namedtuple('DigestRun', ['users', 'emails', 'items'])
+
+
+def _batch_size():
+    return getattr(settings, 'DIGEST_BATCH_SIZE', BATCH_SIZE)
+
+
+def _workers():
+    return getattr(settings, 'DIGEST_WORKERS', WORKERS)
+
+
+def _absolute(link):
+    if not link:
+        return settings.SITE_URL
+    return link if '://' in link else settings.SITE_URL + link
+
+
+# --- Immediate or digest ------------------------------------------------
+
+def email_or_notify(user, subject, body, message, link=None, dedup_key=None):
+    """
+    An event email for `user`: queued right away for IMMEDIATE users; for
+    digest users an in-app notification instead, which their next digest
+    picks up.
+    """
+    profile = getattr(user, 'profile', None)
+    if profile is not None and profile.wants_digest:
+        Notification.objects.create(user=user, message=message[:255], link=link)
+    else:
+        enqueue_email(subject, body, user.email, dedup_key=dedup_key)
+
+
+# --- Batches ------------------------------------------------------------
+
+def due_user_ids(frequency, until, after_user_id=0, limit=None):
+    """Next `limit` active users on `frequency` whose last digest is a period old, by user id."""
+    not_before = until - PERIODS[frequency] + DUE_SLACK
+    return list(
+        Profile.objects
+        .filter(email_digest=frequency, user__is_active=True, user_id__gt=after_user_id)
+        .filter(Q(digest_sent_at__isnull=True) | Q(digest_sent_at__lte=not_before))
+        .order_by('user_id')
+        .values_list('user_id', flat=True)[:limit or _batch_size()]
+    )
+
+
+def _pending_notifications(user_ids, until):
+    rows = (
+        Notification.objects
+        .filter(user_id__in=user_ids, is_read=False, created_at__lte=until)
+        .filter(created_at__gt=Coalesce(F('user__profile__digest_sent_at'), F('user__date_joined')))
+        .order_by('user_id', '-created_at', '-id')
+        .values_list('user_id', 'message', 'link', 'created_at')
+    )
+    grouped = defaultdict(list)
+    for user_id, message, link, created_at in rows:
+        grouped[user_id].append(DigestItem(message, _absolute(link), created_at))
+    return grouped
+
+
+def _pending_feed_announcements(user_ids, until):
+    # One filter() call, so every condition applies to the same enrollment row
+    rows = (
+        Announcement.objects
+        .filter(
+            delivery=Announcement.FEED,
+            created_at__lte=until,
+            course__enrollments__student_id__in=user_ids,
+            course__enrollments__enrolled_at__lte=F('created_at'),
+            created_at__gt=Coalesce(
+                F('course__enrollments__student__profile__digest_sent_at'),
+                F('course__enrollments__student__date_joined'),
+            ),
+        )
+        .values_list('course__enrollments__student_id', 'id', 'course_id', 'course__title', 'title', 'created_at')
+    )
+    last_seen = {
+        (user_id, course_id): seen
+        for user_id, course_id, seen in CourseFeedCursor.objects.filter(user_id__in=user_ids)
+        .values_list('user_id', 'course_id', 'last_seen_announcement_id')
+    }
+    grouped = defaultdict(list)
+    for user_id, pk, course_id, course_title, title, created_at in rows:
+        if pk <= last_seen.get((user_id, course_id), 0):
+            continue
+        grouped[user_id].append(DigestItem(
+            f"New Announcement in {course_title}: {title}",
+            _absolute(reverse('course-detail', kwargs={'pk': course_id})),
+            created_at,
+        ))
+    return grouped
+
+
+def _render(template, frequency, username, items):
+    items.sort(key=lambda item: item.created_at, reverse=True)
+    period = 'daily' if frequency == Profile.DAILY else 'hourly'
+    subject = f"Your {period} ApiLearn digest: {len(items)} update{'s' if len(items) != 1 else ''}"
+    body = template.render({
+        'username': username,
+        'period': period,
+        'items': items[:MAX_ITEMS],
+        'more': max(len(items) - MAX_ITEMS, 0),
+        'inbox_url': _absolute(reverse('inbox')),
+        'settings_url': _absolute(reverse('edit-profile')),
+    })
+    return subject, body
+
+
+def build_digests(user_ids, frequency, until):
+    """
+    Queue the digests of one batch of users for the window ending at `until`
+    and close the window. Returns (emails queued, items included).
+    """
+    template = get_template('communications/digest_email.txt')
+    users = list(
+        Profile.objects.filter(user_id__in=user_ids, email_digest=frequency)
+        .values_list('user_id', 'user__username', 'user__email')
+    )
+    ids = [user_id for user_id, _, _ in users]
+    if not ids:
+        return 0, 0
+    items = _pending_notifications(ids, until)
+    for user_id, feed_items in _pending_feed_announcements(ids, until).items():
+        items[user_id].extend(feed_items)
+
+    emails = []
+    for user_id, username, email in users:
+        if not items.get(user_id):
+            continue
+        subject, body = _render(template, frequency, username, items[user_id])
+        emails.append(outgoing_email(
+            subject, body, email, dedup_key=f"digest:{frequency}:{user_id}:{until.isoformat()}",
+        ))
+
+    # Reads stay outside the transaction: the window ends at `until`, and
+    # anything newer waits for the next one
+    with transaction.atomic():
+        enqueue_emails(emails)
+        # Users with nothing new move on too, so the next window starts here
+        Profile.objects.filter(user_id__in=ids).update(digest_sent_at=until)
+    return len([email for email in emails if email is not None]), sum(len(user_items) for user_items in items.values())
+
+
+def _build_batch(user_ids, frequency, until):
+    return DigestRun(len(user_ids), *build_digests(user_ids, frequency, until))
+
+
+def _run_batch(user_ids, frequency, until):
+    try:
+        return _build_batch(user_ids, frequency, until)
+    finally:
+        # Worker threads each hold their own connection; don't leak one per batch
+        connection.close()
+
+
+def _due_batches(frequency, until, batch_size):
+    after_user_id = 0
+    while True:
+        user_ids = due_user_ids(frequency, until, after_user_id, batch_size)
+        if not user_ids:
+            return
+        after_user_id = user_ids[-1]
+        yield user_ids
+
+
+def send_digests(frequency, until=None, workers=None, batch_size=None, progress=None):
+    """
+    Queue the `frequency` digests of every user who is due. Batches run on
+    `workers` threads while the next ones are being paged in (one at a time
+    on SQLite). `progress`, if given, is called with a DigestRun after each
+    batch. Returns a DigestRun of totals.
+    """
+    until = until or timezone.now()
+    workers = workers or _workers()
+    batch_size = batch_size or _batch_size()
+    totals = [0, 0, 0]
+
+    def collect(result_of):
+        try:
+            result = result_of()
+        except Exception:
+            logger.exception("Digest batch failed; its users stay due for the next run")
+            return
+        for index, value in enumerate(result):
+            totals[index] += value
+        if progress:
+            progress(result)
+
+    batches = _due_batches(frequency, until, batch_size)
+    if workers <= 1 or connection.vendor == 'sqlite':
+        for user_ids in batches:
+            collect(lambda: _build_batch(user_ids, frequency, until))
+        return DigestRun(*totals)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for user_ids in batches:
+            in_flight.add(pool.submit(_run_batch, user_ids, frequency, until))
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result)
+        for future in in_flight:
+            collect(future.result)
+    return DigestRun(*totals)
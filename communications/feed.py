@@ -0,0 +1,180 @@
+# communications/feed.py
+"""
+Course announcement feeds (fan-out on read).
+
+An announcement posted with delivery=FEED is one row; nothing is written per
+student. The inbox merges the user's personal notifications with the feed
+announcements of their enrolled courses (those posted since they enrolled)
+at read time. Read state is one CourseFeedCursor per (user, course) holding
+the id of the newest announcement seen:
+
+- opening an announcement moves its course's cursor up to it (older ones in
+  that course count as seen too)
+- MarkAllRead moves every cursor to the course's latest announcement
+
+Inbox pages are keyset pages over (created_at, kind, id), newest first. Each
+page takes page size + 1 rows from both sources below (or above) the cursor
+and merges them, so any page costs two small indexed queries.
+"""
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from django.db.models import Exists, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from courses.enrollments import enrolled_course_ids
+from courses.models import Enrollment
+from .models import Announcement, CourseFeedCursor, Notification
+
+INBOX_PAGE_SIZE = 20
+
+NOTIFICATION = 'notification'
+ANNOUNCEMENT = 'announcement'
+# Tie-break between sources sharing a created_at
+RANKS = {NOTIFICATION: 0, ANNOUNCEMENT: 1}
+
+
+class InboxItem(namedtuple('InboxItem', ['kind', 'id', 'message', 'link', 'is_read', 'created_at'])):
+    @property
+    def key(self):
+        return (self.created_at, RANKS[self.kind], self.id)
+
+    @property
+    def read_url(self):
+        name = 'mark-read' if self.kind == NOTIFICATION else 'mark-announcement-read'
+        return reverse(name, args=[self.id])
+
+
+# --- Sources ------------------------------------------------------------
+
+def feed_announcements(user):
+    """Feed announcements of the user's courses posted since they enrolled, with `last_seen` (cursor id)."""
+    enrolled_before = Enrollment.objects.filter(
+        student_id=user.pk, course_id=OuterRef('course_id'), enrolled_at__lte=OuterRef('created_at'),
+    )
+    last_seen = CourseFeedCursor.objects.filter(user_id=user.pk, course_id=OuterRef('course_id')).values('last_seen_announcement_id')[:1]
+    return (
+        Announcement.objects
+        .filter(delivery=Announcement.FEED, course_id__in=enrolled_course_ids(user))
+        .filter(Exists(enrolled_before))
+        .annotate(last_seen=Coalesce(Subquery(last_seen), Value(0)))
+    )
+
+
+def _notification_items(queryset):
+    rows = queryset.values_list('id', 'message', 'link', 'is_read', 'created_at')
+    return [InboxItem(NOTIFICATION, *row) for row in rows]
+
+
+def _announcement_items(queryset):
+    rows = queryset.values_list('id', 'course_id', 'course__title', 'title', 'created_at', 'last_seen')
+    return [
+        InboxItem(
+            ANNOUNCEMENT, pk, f"New Announcement in {course_title}: {title}",
+            reverse('course-detail', kwargs={'pk': course_id}), pk <= last_seen, created_at,
+        )
+        for pk, course_id, course_title, title, created_at, last_seen in rows
+    ]
+
+
+# --- Keyset pages -------------------------------------------------------
+
+def _encode(direction, key):
+    created_at, rank, pk = key
+    raw = f"{direction}|{created_at.isoformat()}|{rank}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode(token):
+    """(direction, key) or None for a missing/invalid cursor."""
+    try:
+        direction, created_at, rank, pk = base64.urlsafe_b64decode(token.encode()).decode().split('|')
+        if direction not in ('older', 'newer'):
+            return None
+        return direction, (datetime.fromisoformat(created_at), int(rank), int(pk))
+    except (ValueError, UnicodeError):
+        return None
+
+
+def _beyond(queryset, rank, direction, key):
+    """Rows of a source (all of `rank`) strictly older/newer than `key` in (created_at, rank, id) order."""
+    created_at, key_rank, pk = key
+    if direction == 'older':
+        if rank < key_rank:
+            return queryset.filter(created_at__lte=created_at)
+        if rank > key_rank:
+            return queryset.filter(created_at__lt=created_at)
+        return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    if rank > key_rank:
+        return queryset.filter(created_at__gte=created_at)
+    if rank < key_rank:
+        return queryset.filter(created_at__gt=created_at)
+    return queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+
+def inbox_page(user, cursor=None, size=INBOX_PAGE_SIZE):
+    """
+    One inbox page, newest first: (items, previous_cursor, next_cursor).
+    `cursor` is a token from a previous page; missing or invalid means the first page.
+    """
+    decoded = _decode(cursor) if cursor else None
+    direction, key = decoded if decoded else ('older', None)
+    newest_first = direction == 'older'
+    order = ('-created_at', '-id') if newest_first else ('created_at', 'id')
+
+    sources = (
+        (Notification.objects.filter(user_id=user.pk), RANKS[NOTIFICATION], _notification_items),
+        (feed_announcements(user), RANKS[ANNOUNCEMENT], _announcement_items),
+    )
+    items = []
+    for queryset, rank, to_items in sources:
+        if key is not None:
+            queryset = _beyond(queryset, rank, direction, key)
+        items.extend(to_items(queryset.order_by(*order)[:size + 1]))
+
+    items.sort(key=lambda item: item.key, reverse=newest_first)
+    has_more = len(items) > size
+    items = items[:size]
+    if not newest_first:
+        items.reverse()
+    if not items:
+        return [], None, None
+
+    # Coming from a page means there is something on that side of this one
+    has_older = has_more if newest_first else True
+    has_newer = key is not None if newest_first else has_more
+    previous_cursor = _encode('newer', items[0].key) if has_newer else None
+    next_cursor = _encode('older', items[-1].key) if has_older else None
+    return items, previous_cursor, next_cursor
+
+
+# --- Read state ---------------------------------------------------------
+
+def mark_announcement_seen(user, announcement):
+    """Move the user's cursor for the announcement's course up to it (never back)."""
+    moved = CourseFeedCursor.objects.filter(
+        user_id=user.pk, course_id=announcement.course_id, last_seen_announcement_id__lt=announcement.pk,
+    ).update(last_seen_announcement_id=announcement.pk)
+    if not moved:
+        CourseFeedCursor.objects.get_or_create(
+            user_id=user.pk, course_id=announcement.course_id,
+            defaults={'last_seen_announcement_id': announcement.pk},
+        )
+
+
+def mark_all_seen(user):
+    """Every enrolled course's cursor to its latest feed announcement: two queries."""
+    latest = (
+        Announcement.objects
+        .filter(delivery=Announcement.FEED, course_id__in=enrolled_course_ids(user))
+        .values('course_id')
+        .annotate(latest=Max('id'))
+    )
+    CourseFeedCursor.objects.bulk_create(
+        [CourseFeedCursor(user_id=user.pk, course_id=row['course_id'], last_seen_announcement_id=row['latest']) for row in latest],
+        update_conflicts=True,
+        unique_fields=['user', 'course'],
+        update_fields=['last_seen_announcement_id', 'updated_at'],
+    )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from communications.delivery import deliver_pending_announcements
+from communications.models import Announcement
+
+
+class Command(BaseCommand):
+    help = "Worker that delivers queued announcements (in-app notifications and batched email)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue and exit instead of polling forever.")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Also resume announcements whose delivery previously failed.")
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            requeued = Announcement.objects.filter(status=Announcement.FAILED).update(status=Announcement.PENDING, error='')
+            self.stdout.write(f"Re-queued {requeued} failed announcements")
+
+        def progress(announcement):
+            self.stdout.write(
+                f"Announcement {announcement.pk}: {announcement.notified_count}/{announcement.recipient_count} notified, "
+                f"{announcement.emailed_count} emailed, {announcement.failed_email_count} email failures"
+            )
+
+        while True:
+            delivered, failed = deliver_pending_announcements(progress=progress)
+            if delivered or failed:
+                self.stdout.write(f"Delivered {delivered}, failed {failed}")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS("Announcement queue drained."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from communications.unread import recount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user unread-notification counters from the notifications themselves."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only recount this user ID (can be repeated).")
+
+    def handle(self, *args, **options):
+        written = recount(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Done. {written} unread counters rebuilt."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from communications.digests import PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = "Queue notification digest emails for every user due one (run from cron once per period)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('frequency', choices=sorted(PERIODS),
+                            help="Which digest to send.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Batches built in parallel (default: DIGEST_WORKERS; always one on SQLite).")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Users per batch (default: DIGEST_BATCH_SIZE).")
+
+    def handle(self, *args, **options):
+        def progress(batch):
+            self.stdout.write(f"Batch of {batch.users} users: {batch.emails} digests, {batch.items} items")
+
+        totals = send_digests(
+            options['frequency'], workers=options['workers'], batch_size=options['batch_size'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['frequency'].capitalize()} digests: {totals.emails} queued for {totals.users} users "
+            f"({totals.items} items). The send_outbox_emails worker delivers them."
+        ))
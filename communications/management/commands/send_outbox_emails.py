@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from communications import outbox
+from communications.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = "Worker that sends queued transactional email from the outbox in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Emails claimed and sent per batch (default settings.OUTBOX_BATCH_SIZE).")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when no email is due.")
+        parser.add_argument('--once', action='store_true',
+                            help="Send everything that is due and exit instead of polling forever.")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Also re-queue emails that ran out of attempts.")
+        parser.add_argument('--stats', action='store_true',
+                            help="Print the outbox counts by status and exit.")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for status, count in outbox.outbox_stats().items():
+                self.stdout.write(f"{status}: {count}")
+            return
+
+        if options['retry_failed']:
+            requeued = OutgoingEmail.objects.filter(status=OutgoingEmail.FAILED).update(
+                status=OutgoingEmail.PENDING, attempts=0, next_attempt_at=timezone.now(),
+            )
+            self.stdout.write(f"Re-queued {requeued} failed emails")
+
+        sender = outbox.OutboxSender()
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        try:
+            while True:
+                emails = outbox.claim_batch(options['batch_size'])
+                if emails:
+                    result = sender.send_batch(emails)
+                    for field in totals:
+                        totals[field] += getattr(result, field)
+                    rate = len(emails) / result.seconds if result.seconds else 0.0
+                    self.stdout.write(
+                        f"Batch of {len(emails)}: {result.sent} sent, {result.retried} retried, "
+                        f"{result.failed} failed ({rate:.1f} emails/s)"
+                    )
+                    continue
+                if options['once']:
+                    break
+                # Nothing due: don't hold an idle SMTP session open while sleeping
+                sender.close()
+                time.sleep(options['poll_interval'])
+        finally:
+            sender.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {totals['sent']} sent, {totals['retried']} retried, {totals['failed']} failed."
+        ))
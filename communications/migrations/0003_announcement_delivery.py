@@ -0,0 +1,63 @@
+from django.db import migrations, models
+
+
+def mark_existing_sent(apps, schema_editor):
+    # Announcements created before this migration were delivered synchronously
+    Announcement = apps.get_model('communications', 'Announcement')
+    Announcement.objects.update(status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0002_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='emailed_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='failed_email_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='last_student_id',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='notified_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='recipient_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_sent, migrations.RunPython.noop),
+    ]
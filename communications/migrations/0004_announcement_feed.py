@@ -0,0 +1,54 @@
+import communications.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_existing_push(apps, schema_editor):
+    # Existing announcements already have a Notification per student
+    Announcement = apps.get_model('communications', 'Announcement')
+    Announcement.objects.update(delivery='push')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0003_announcement_delivery'),
+        ('courses', '0014_lesson_outline_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseFeedCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seen_announcement_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='announcement',
+            name='delivery',
+            field=models.CharField(choices=[('push', 'Notification per student'), ('feed', 'Course feed')], default=communications.models.default_delivery, max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['course', 'delivery', '-created_at', '-id'], name='announcement_feed_idx'),
+        ),
+        migrations.AddField(
+            model_name='coursefeedcursor',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course'),
+        ),
+        migrations.AddField(
+            model_name='coursefeedcursor',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_cursors', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='coursefeedcursor',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='feed_cursor_user_course_uniq'),
+        ),
+        migrations.RunPython(mark_existing_push, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_unread(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Notification = apps.get_model('communications', 'Notification')
+    UnreadCounter = apps.get_model('communications', 'UnreadCounter')
+    unread = dict(
+        Notification.objects.filter(is_read=False).values('user_id').annotate(total=Count('pk')).values_list('user_id', 'total')
+    )
+    UnreadCounter.objects.bulk_create(
+        (UnreadCounter(user_id=user_id, unread=unread.get(user_id, 0)) for user_id in User.objects.values_list('pk', flat=True).iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('communications', '0005_email_outbox'),
+        ('users', '0004_profile_email_digest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_unread_idx'),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
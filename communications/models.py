@@ -1,17 +1,68 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from courses.models import Course
 
+def default_delivery():
+    return getattr(settings, 'ANNOUNCEMENT_DELIVERY', Announcement.PUSH)
+
+
 class Announcement(models.Model):
+    # PUSH writes a Notification per enrolled student; FEED writes nothing
+    # per student and is merged into inboxes at read time (communications/feed.py)
+    PUSH = 'push'
+    FEED = 'feed'
+
+    DELIVERY_CHOICES = (
+        (PUSH, 'Notification per student'),
+        (FEED, 'Course feed'),
+    )
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='announcements')
     instructor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    delivery = models.CharField(max_length=10, choices=DELIVERY_CHOICES, default=default_delivery)
+
+    # Delivery happens in the deliver_announcements worker, not the request
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    recipient_count = models.PositiveIntegerField(default=0)
+    notified_count = models.PositiveIntegerField(default=0)
+    emailed_count = models.PositiveIntegerField(default=0)
+    failed_email_count = models.PositiveIntegerField(default=0)
+    # Students are processed in student id order; delivery resumes after this one
+    last_student_id = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['course', 'delivery', '-created_at', '-id'], name='announcement_feed_idx')]
 
     def __str__(self):
         return f"{self.title} ({self.course.title})"
 
+    @property
+    def progress_percent(self):
+        if self.status == self.SENT:
+            return 100
+        if not self.recipient_count:
+            return 0
+        return min(100, round(100 * self.notified_count / self.recipient_count))
+
 class Notification(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
     message = models.CharField(max_length=255)
@@ -23,6 +74,79 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_recent_idx'),
+            # Unread counts, mark-all-read and digest windows
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_unread_idx'),
+        ]
+
+    def __str__(self):
+        return f"To {self.user.username}: {self.message}"
+
+
+class UnreadCounter(models.Model):
+    """
+    A user's unread personal notifications, kept in step with F() updates
+    (communications/unread.py). Its own row, so Profile/User saves never
+    write back a stale count.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class CourseFeedCursor(models.Model):
+    """A user's read position in a course's announcement feed: every feed announcement up to this id is seen."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_cursors')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    last_seen_announcement_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'course'], name='feed_cursor_user_course_uniq')]
+
+    def __str__(self):
+        return f"{self.user_id} @ course {self.course_id}: {self.last_seen_announcement_id}"
+
+
+class OutgoingEmail(models.Model):
+    """
+    Transactional email outbox. Rows are written in the same transaction as
+    the change that triggers them and sent by the send_outbox_emails worker
+    (communications/outbox.py).
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    is_html = models.BooleanField(default=False)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    # Same key, same email: a second enqueue with it is ignored (e.g. a refreshed payment callback)
+    dedup_key = models.CharField(max_length=255, unique=True, blank=True, null=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest next send; also the lease of a worker that has claimed the row
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set by the worker that holds the lease, so it reads back exactly its own rows
+    claim_token = models.UUIDField(blank=True, null=True, editable=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at', 'id'], name='outbox_due_idx')]
 
     def __str__(self):
-        return f"To {self.user.username}: {self.message}"
\ No newline at end of file
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
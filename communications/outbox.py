@@ -0,0 +1,180 @@
+# communications/outbox.py
+"""
+Durable email outbox.
+
+Code that used to call send_mail() now calls `enqueue_email()`. That writes
+an OutgoingEmail row in the caller's transaction, so the email exists if and
+only if the change that caused it was committed, and no request ever waits
+on SMTP.
+
+The `send_outbox_emails` worker drains the table:
+
+- claims up to OUTBOX_BATCH_SIZE due rows by pushing their `next_attempt_at` out by
+  LEASE and stamping them with its own claim token, which it reads them back
+  by (a worker that dies just lets the lease run out)
+- sends them over one SMTP connection that stays open across batches and is
+  reopened after an error
+- marks them sent, or schedules a retry with exponential backoff; after
+  OUTBOX_MAX_ATTEMPTS a row is FAILED
+- reports sent/failed/retried counts and messages per second per batch
+
+`dedup_key` makes enqueueing idempotent: a second email with the same key is
+dropped by the unique constraint (INSERT ... ON CONFLICT DO NOTHING).
+"""
+import logging
+import time
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+MAX_ATTEMPTS = 6
+LEASE = timedelta(minutes=5)
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=2)
+
+BatchResult = namedtuple('BatchResult', ['sent', 'retried', 'failed', 'seconds'])
+
+
+def batch_size():
+    return getattr(settings, 'OUTBOX_BATCH_SIZE', BATCH_SIZE)
+
+
+def _max_attempts():
+    return getattr(settings, 'OUTBOX_MAX_ATTEMPTS', MAX_ATTEMPTS)
+
+
+def outgoing_email(subject, body, to, *, dedup_key=None, is_html=False, from_email=None):
+    """An unsaved OutgoingEmail, or None when there is no one to send it to. `to` is an address or a list."""
+    recipients = [to] if isinstance(to, str) else list(to)
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+    return OutgoingEmail(
+        subject=subject[:255],
+        body=body,
+        is_html=is_html,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=recipients,
+        dedup_key=dedup_key,
+    )
+
+
+def enqueue_emails(emails):
+    """Queue many emails (from `outgoing_email`) with one INSERT; duplicates by dedup_key are dropped."""
+    OutgoingEmail.objects.bulk_create([email for email in emails if email is not None], ignore_conflicts=True)
+
+
+def enqueue_email(subject, body, to, *, dedup_key=None, is_html=False, from_email=None):
+    """Queue one email. `to` is an address or a list; blank addresses are dropped."""
+    enqueue_emails([outgoing_email(subject, body, to, dedup_key=dedup_key, is_html=is_html, from_email=from_email)])
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts` (30s, 1m, 2m, 4m, ... capped at 2h)."""
+    # Past the cap the doubling stops; a huge OUTBOX_MAX_ATTEMPTS would overflow timedelta
+    doublings = min(max(attempts - 1, 0), (BACKOFF_MAX // BACKOFF_BASE).bit_length())
+    return min(BACKOFF_BASE * (2 ** doublings), BACKOFF_MAX)
+
+
+def claim_batch(size=None):
+    """Lease up to `size` due emails to this worker, oldest first."""
+    size = size or batch_size()
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            OutgoingEmail.objects
+            .filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .select_for_update(skip_locked=True)
+        )
+        ids = list(due.values_list('pk', flat=True)[:size])
+        if not ids:
+            return []
+        # The filter keeps a concurrent worker (on databases without row locks) from double-claiming
+        token = uuid.uuid4()
+        OutgoingEmail.objects.filter(pk__in=ids, next_attempt_at__lte=now).update(
+            next_attempt_at=now + LEASE, claim_token=token,
+        )
+    return list(OutgoingEmail.objects.filter(pk__in=ids, claim_token=token).order_by('id'))
+
+
+class OutboxSender:
+    """Sends claimed batches over one long-lived mail connection."""
+
+    def __init__(self, connection=None):
+        self.connection = connection or get_connection(fail_silently=False)
+        self._open = False
+
+    def _send(self, email):
+        if not self._open:
+            self.connection.open()
+            self._open = True
+        message = EmailMessage(email.subject, email.body, email.from_email, to=email.to, connection=self.connection)
+        if email.is_html:
+            message.content_subtype = 'html'
+        self.connection.send_messages([message])
+
+    def _reset(self):
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+        self._open = False
+
+    def close(self):
+        self._reset()
+
+    def send_batch(self, emails):
+        started = time.monotonic()
+        now = timezone.now()
+        sent = retried = failed = 0
+        max_attempts = _max_attempts()
+        for email in emails:
+            email.attempts += 1
+            try:
+                self._send(email)
+            except Exception as exc:
+                # The connection may be broken; the next email reconnects
+                self._reset()
+                email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                if email.attempts >= max_attempts:
+                    email.status = OutgoingEmail.FAILED
+                    failed += 1
+                    logger.error("Email %s failed permanently after %d attempts: %s", email.pk, email.attempts, email.last_error)
+                else:
+                    email.next_attempt_at = now + backoff(email.attempts)
+                    retried += 1
+            else:
+                email.status = OutgoingEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent += 1
+
+        OutgoingEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'])
+        result = BatchResult(sent, retried, failed, time.monotonic() - started)
+        if emails:
+            logger.info(
+                "Outbox batch: %d sent, %d retried, %d failed in %.2fs (%.1f emails/s)",
+                sent, retried, failed, result.seconds, len(emails) / result.seconds if result.seconds else 0.0,
+            )
+        return result
+
+
+def outbox_stats():
+    """{status: count} in one grouped query, plus the number of pending emails already due."""
+    counts = {status: 0 for status, _ in OutgoingEmail.STATUS_CHOICES}
+    for row in OutgoingEmail.objects.values('status').annotate(total=Count('pk')).order_by():
+        counts[row['status']] = row['total']
+    counts['due'] = OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=timezone.now()).count()
+    return counts
@@ -1,40 +1,34 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Announcement, Notification
+from django.contrib.auth import get_user_model
+from .models import Announcement, Notification, UnreadCounter
 from courses.models import Enrollment
+from . import unread
 
 @receiver(post_save, sender=Announcement)
-def broadcast_announcement(sender, instance, created, **kwargs):
+def queue_announcement(sender, instance, created, **kwargs):
     if created:
-        # 1. Find all enrolled students
-        enrollments = Enrollment.objects.filter(course=instance.course)
-        
-        # 2. Prepare Email List
-        recipient_emails = []
-        
-        for enrollment in enrollments:
-            student = enrollment.student
-            
-            # A. Create In-App Notification
-            Notification.objects.create(
-                user=student,
-                message=f"New Announcement in {instance.course.title}: {instance.title}",
-                link=f"/courses/{instance.course.id}/" # Link to course
-            )
-            
-            # B. Add to email list
-            recipient_emails.append(student.email)
+        # Delivery runs in the deliver_announcements worker (communications/delivery.py);
+        # the recipient count is known up front so the status page can show "0 of N"
+        recipient_count = Enrollment.objects.filter(course_id=instance.course_id).count()
+        Announcement.objects.filter(pk=instance.pk).update(recipient_count=recipient_count)
+        instance.recipient_count = recipient_count
 
-        # 3. Send Mass Email (Bulk is better for performance)
-        if recipient_emails:
-            send_mail(
-                subject=f"📢 {instance.course.title}: {instance.title}",
-                message=f"{instance.content}\n\n- {instance.instructor.username}",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[], # Leave empty to use bcc
-                bcc=recipient_emails, # Use BCC to hide student emails from each other
-                fail_silently=True,
-            )
-            print(f"📧 BROADCAST SENT: {len(recipient_emails)} students notified.")
\ No newline at end of file
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_unread_counter(sender, instance, created, **kwargs):
+    if created:
+        UnreadCounter.objects.get_or_create(user=instance)
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    # Bulk-created notifications are counted by their creator (see communications/delivery.py)
+    if created and not instance.is_read:
+        unread.notifications_created([instance.user_id])
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, origin=None, **kwargs):
+    # Deleting the user takes their counter with them
+    if instance.is_read or getattr(origin, 'model', type(origin)) is get_user_model():
+        return
+    unread.notifications_read(instance.user_id)
@@ -0,0 +1,40 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from communications.models import OutgoingEmail
+from courses.testing import create_catalog, create_user
+from users.models import Profile
+
+
+class SendDigestsCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor, cls.student, cls.courses = create_catalog()
+        cls.quiet = create_user('quiet')
+        Profile.objects.filter(user__in=[cls.student, cls.quiet]).update(email_digest=Profile.DAILY)
+
+    def send(self):
+        out = io.StringIO()
+        # Several batches and workers; SQLite runs them one after another
+        call_command('send_digests', Profile.DAILY, workers=4, batch_size=1, stdout=out)
+        return out.getvalue()
+
+    def test_queues_one_digest_per_user_with_news(self):
+        output = self.send()
+        self.assertIn('Daily digests: 1 queued for 2 users (4 items)', output)
+
+        email = OutgoingEmail.objects.get(dedup_key__startswith='digest:')
+        self.assertEqual(email.to, [self.student.email])
+        self.assertEqual(email.subject, 'Your daily ApiLearn digest: 4 updates')
+        self.assertIn('Welcome', email.body)
+        for course in self.courses:
+            self.assertIn(f'New Announcement in {course.title}: Welcome', email.body)
+        # Users with nothing new move on to the next window too
+        self.assertEqual(Profile.objects.filter(digest_sent_at__isnull=False).count(), 2)
+
+    def test_second_run_sends_nothing(self):
+        self.send()
+        self.assertIn('0 queued for 0 users', self.send())
+        self.assertEqual(OutgoingEmail.objects.filter(dedup_key__startswith='digest:').count(), 1)
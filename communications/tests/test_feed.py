@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from communications import feed, unread
+from communications.models import Announcement, Notification, UnreadCounter
+from courses.models import Category, Course, Enrollment
+from courses.testing import create_user
+
+
+class FeedUnreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = create_user('teacher', role='instructor')
+        cls.student = create_user('student')
+        category = Category.objects.create(title='Web', slug='web')
+        cls.courses = [
+            Course.objects.create(
+                title=f'Django {number}', description='REST APIs', instructor=cls.instructor,
+                category=category, price=0, is_published=True,
+            )
+            for number in range(2)
+        ]
+        # Posted before the student enrolled: never part of their feed
+        cls.announce(cls.courses[0], 'Old news')
+        for course in cls.courses:
+            Enrollment.objects.create(student=cls.student, course=course)
+
+    @classmethod
+    def announce(cls, course, title):
+        return Announcement.objects.create(
+            course=course, instructor=cls.instructor, title=title, content='...', delivery=Announcement.FEED,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def test_counts_notifications_and_feed(self):
+        self.assertEqual(unread.unread_count(self.student), 0)
+        Notification.objects.create(user=self.student, message='Hi')
+        self.announce(self.courses[0], 'Week 1')
+        self.announce(self.courses[1], 'Week 1')
+        cache.clear()
+        self.assertEqual(unread.unread_count(self.student), 3)
+        # The instructor is not enrolled
+        self.assertEqual(unread.unread_count(self.instructor), 0)
+
+    def test_new_feed_announcement_waits_for_the_cached_count(self):
+        self.assertEqual(unread.unread_count(self.student), 0)
+        self.announce(self.courses[0], 'Week 1')
+        # Nothing is written per student; the cached feed count expires instead
+        self.assertEqual(unread.unread_count(self.student), 0)
+        cache.delete(unread._feed_key(self.student.pk))
+        self.assertEqual(unread.unread_count(self.student), 1)
+
+    def test_opening_an_announcement_marks_older_ones_in_its_course(self):
+        first = self.announce(self.courses[0], 'Week 1')
+        second = self.announce(self.courses[0], 'Week 2')
+        self.announce(self.courses[1], 'Week 1')
+        self.assertEqual(unread.unread_count(self.student), 3)
+
+        response = self.client.get(reverse('mark-announcement-read', args=[second.pk]))
+        self.assertRedirects(response, reverse('course-detail', args=[self.courses[0].pk]), fetch_redirect_response=False)
+        self.assertEqual(unread.unread_count(self.student), 1)
+
+        # Opening an older one never moves the cursor back
+        self.client.get(reverse('mark-announcement-read', args=[first.pk]))
+        self.assertEqual(unread.unread_count(self.student), 1)
+
+    def test_mark_all_read(self):
+        Notification.objects.create(user=self.student, message='Hi')
+        self.announce(self.courses[0], 'Week 1')
+        self.announce(self.courses[1], 'Week 1')
+        self.assertEqual(unread.unread_count(self.student), 3)
+
+        self.client.get(reverse('mark-all-read'))
+        self.assertEqual(unread.unread_count(self.student), 0)
+        items, _, _ = feed.inbox_page(self.student)
+        self.assertTrue(all(item.is_read for item in items))
+
+    def test_reading_and_deleting_notifications(self):
+        read, deleted, _ = [Notification.objects.create(user=self.student, message=f'Hi {n}') for n in range(3)]
+        self.assertEqual(unread.unread_count(self.student), 3)
+        self.client.get(reverse('mark-read', args=[read.pk]))
+        self.client.get(reverse('mark-read', args=[read.pk]))
+        deleted.delete()
+        self.assertEqual(unread.unread_count(self.student), 1)
+
+    def test_missing_counter_is_rebuilt(self):
+        Notification.objects.create(user=self.student, message='Hi')
+        UnreadCounter.objects.filter(user=self.student).delete()
+        self.assertEqual(unread.unread_count(self.student), 1)
+        self.assertEqual(UnreadCounter.objects.get(user=self.student).unread, 1)
+
+    def test_inbox_pages_merge_both_sources(self):
+        Notification.objects.create(user=self.student, message='Hi')
+        self.announce(self.courses[0], 'Week 1')
+        self.announce(self.courses[1], 'Week 1')
+
+        first, _, older = feed.inbox_page(self.student, size=2)
+        second, newer, last = feed.inbox_page(self.student, cursor=older, size=2)
+        self.assertEqual(
+            [item.message for item in first + second],
+            ['New Announcement in Django 1: Week 1', 'New Announcement in Django 0: Week 1', 'Hi'],
+        )
+        self.assertIsNone(last)
+        self.assertEqual(feed.inbox_page(self.student, cursor=newer, size=2)[0], first)
@@ -0,0 +1,88 @@
+import io
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from communications import outbox
+from communications.models import OutgoingEmail
+
+
+class FailingBackend(EmailBackend):
+    """Refuses every message, like an SMTP server that is down."""
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError("SMTP is down")
+
+
+class OutboxTests(TestCase):
+    def queue(self, count=1, **kwargs):
+        for number in range(count):
+            outbox.enqueue_email(f'Subject {number}', 'Body', f'user{number}@example.com', **kwargs)
+
+    def test_dedup_key(self):
+        outbox.enqueue_email('Paid', 'Thanks', 'a@example.com', dedup_key='payment:1')
+        outbox.enqueue_email('Paid', 'Thanks', 'a@example.com', dedup_key='payment:1')
+        outbox.enqueue_email('Nobody', 'Body', ['', None])
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+
+    def test_claim_leases_the_batch(self):
+        self.queue(3)
+        claimed = outbox.claim_batch(2)
+        self.assertEqual([email.subject for email in claimed], ['Subject 0', 'Subject 1'])
+        self.assertEqual(len({email.claim_token for email in claimed}), 1)
+        self.assertGreater(claimed[0].next_attempt_at, timezone.now() + outbox.LEASE - timedelta(seconds=5))
+
+        # Leased rows are not due; the rest are
+        self.assertEqual([email.subject for email in outbox.claim_batch(2)], ['Subject 2'])
+        self.assertEqual(outbox.claim_batch(2), [])
+
+        # A worker that died: its lease runs out and another worker takes over
+        OutgoingEmail.objects.filter(pk=claimed[0].pk).update(next_attempt_at=timezone.now())
+        reclaimed = outbox.claim_batch(2)
+        self.assertEqual([email.pk for email in reclaimed], [claimed[0].pk])
+        self.assertNotEqual(reclaimed[0].claim_token, claimed[0].claim_token)
+
+    def test_send(self):
+        self.queue(2)
+        result = outbox.OutboxSender().send_batch(outbox.claim_batch())
+        self.assertEqual((result.sent, result.retried, result.failed), (2, 0, 0))
+        self.assertEqual([message.to for message in mail.outbox], [['user0@example.com'], ['user1@example.com']])
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists())
+        self.assertFalse(OutgoingEmail.objects.filter(sent_at__isnull=True).exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_retry_with_backoff_then_fail(self):
+        self.queue()
+        sender = outbox.OutboxSender(FailingBackend())
+
+        before = timezone.now()
+        result = sender.send_batch(outbox.claim_batch())
+        self.assertEqual((result.sent, result.retried, result.failed), (0, 1, 0))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), (OutgoingEmail.PENDING, 1))
+        self.assertIn('SMTP is down', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, before + outbox.backoff(1))
+        self.assertEqual(outbox.claim_batch(), [])
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        with self.assertLogs('communications.outbox', 'ERROR'):
+            result = sender.send_batch(outbox.claim_batch())
+        self.assertEqual(result.failed, 1)
+        self.assertEqual(OutgoingEmail.objects.get().status, OutgoingEmail.FAILED)
+
+    def test_backoff(self):
+        self.assertEqual(
+            [outbox.backoff(attempt).total_seconds() for attempt in (1, 2, 3)], [30, 60, 120],
+        )
+        self.assertEqual(outbox.backoff(50), outbox.BACKOFF_MAX)
+
+    def test_worker_command(self):
+        self.queue(3)
+        out = io.StringIO()
+        call_command('send_outbox_emails', once=True, batch_size=2, stdout=out)
+        self.assertIn('Outbox drained: 3 sent, 0 retried, 0 failed.', out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
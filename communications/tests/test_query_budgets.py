@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from courses.querycount import QueryBudgetTestMixin
+from courses.testing import create_catalog
+
+
+class InboxQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """The inbox (notifications merged with feed announcements) stays within its budget on a cold cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor, cls.student, _ = create_catalog()
+
+    def get_inbox(self):
+        cache.clear()
+        response = self.client.get(reverse('inbox'))
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryBudget(response)
+        return response
+
+    def test_student(self):
+        self.client.force_login(self.student)
+        response = self.get_inbox()
+        self.assertContains(response, 'Welcome')
+
+    def test_instructor(self):
+        self.client.force_login(self.instructor)
+        self.get_inbox()
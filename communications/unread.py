@@ -0,0 +1,132 @@
+# communications/unread.py
+"""
+Unread-notification counts for the navbar badge.
+
+Personal notifications: an UnreadCounter row per user, changed only with
+F() updates in the same transaction as the notifications themselves
+(created, read, mark all read, deleted), and cached per user. Any change
+drops the cache entry now and again after commit, like cached enrollments.
+
+Course feed announcements (communications/feed.py) are counted at read time:
+the ones newer than the user's feed cursor, posted since they enrolled. A new
+feed announcement touches no per-student row, so that count is cached for
+FEED_UNREAD_TIMEOUT seconds instead and shows up in badges within that time.
+The user's own reads drop it at once.
+
+A badge is one cache round trip; on a miss, one primary-key read and one
+indexed count.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from .feed import feed_announcements
+from .models import Notification, UnreadCounter
+
+UNREAD_TIMEOUT = 60 * 60
+FEED_UNREAD_TIMEOUT = 60
+
+
+def _counter_key(user_id):
+    return f'user:{user_id}:unread-notifications'
+
+
+def _feed_key(user_id):
+    return f'user:{user_id}:unread-feed'
+
+
+def _invalidate(keys):
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_feed_unread(user_id):
+    _invalidate([_feed_key(user_id)])
+
+
+# --- Counter updates ----------------------------------------------------
+
+def notifications_created(user_ids):
+    """One new unread notification for each of `user_ids` (bulk_create skips the post_save signal)."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    UnreadCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + 1)
+    _invalidate([_counter_key(user_id) for user_id in user_ids])
+
+
+def notifications_read(user_id, count=1):
+    """`count` of the user's unread notifications were read (or deleted)."""
+    if not count:
+        return
+    UnreadCounter.objects.filter(user_id=user_id).update(unread=Greatest(F('unread') - count, Value(0)))
+    _invalidate([_counter_key(user_id)])
+
+
+def mark_read(user, notification_id):
+    """Mark one notification read; the counter moves only if it was unread."""
+    with transaction.atomic():
+        changed = Notification.objects.filter(pk=notification_id, user_id=user.pk, is_read=False).update(is_read=True)
+        notifications_read(user.pk, changed)
+
+
+def mark_all_read(user):
+    with transaction.atomic():
+        changed = Notification.objects.filter(user_id=user.pk, is_read=False).update(is_read=True)
+        # Minus what this update marked, not zero: one created meanwhile stays unread
+        notifications_read(user.pk, changed)
+
+
+def recount(user_ids=None):
+    """Rebuild counters from the notifications themselves (all users by default). Returns the rows written."""
+    users = get_user_model().objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    user_ids = list(users.values_list('pk', flat=True))
+    unread = dict(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values('user_id').annotate(total=Count('pk')).values_list('user_id', 'total')
+    )
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, unread=unread.get(user_id, 0)) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['unread'],
+    )
+    _invalidate([_counter_key(user_id) for user_id in user_ids])
+    return len(user_ids)
+
+
+# --- Reads --------------------------------------------------------------
+
+def _personal_unread(user_id):
+    unread = UnreadCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first()
+    if unread is None:
+        # A user whose counter row went missing
+        recount([user_id])
+        unread = UnreadCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
+    return unread
+
+
+def _feed_unread(user):
+    return feed_announcements(user).filter(pk__gt=F('last_seen')).count()
+
+
+def unread_count(user):
+    """Unread personal notifications plus unseen feed announcements of `user`."""
+    if not getattr(user, 'is_authenticated', False):
+        return 0
+    counter_key, feed_key = _counter_key(user.pk), _feed_key(user.pk)
+    cached = cache.get_many([counter_key, feed_key])
+
+    personal = cached.get(counter_key)
+    if personal is None:
+        personal = _personal_unread(user.pk)
+        cache.set(counter_key, personal, UNREAD_TIMEOUT)
+    feed = cached.get(feed_key)
+    if feed is None:
+        feed = _feed_unread(user)
+        cache.set(feed_key, feed, FEED_UNREAD_TIMEOUT)
+    return personal + feed
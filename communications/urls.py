@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import NotificationListView, MarkNotificationRead, MarkAllRead, AnnouncementCreateView
+from .views import NotificationListView, MarkNotificationRead, MarkAnnouncementRead, MarkAllRead, AnnouncementCreateView, AnnouncementStatusView
 
 urlpatterns = [
     path('inbox/', NotificationListView.as_view(), name='inbox'),
     path('read/<int:pk>/', MarkNotificationRead.as_view(), name='mark-read'),
     path('read/all/', MarkAllRead.as_view(), name='mark-all-read'),
+    path('read/announcement/<int:pk>/', MarkAnnouncementRead.as_view(), name='mark-announcement-read'),
     path('announce/<int:course_id>/', AnnouncementCreateView.as_view(), name='create-announcement'),
+    path('announce/status/<int:pk>/', AnnouncementStatusView.as_view(), name='announcement-status'),
 ]
\ No newline at end of file
@@ -1,9 +1,10 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.views.generic import ListView, CreateView, View
+from django.views.generic import ListView, CreateView, DetailView, View
 from django.urls import reverse
 from .models import Notification, Announcement
 from courses.models import Course
+from . import feed, unread
 
 # --- NOTIFICATIONS (INBOX) ---
 class NotificationListView(LoginRequiredMixin, ListView):
@@ -14,20 +15,46 @@ class NotificationListView(LoginRequiredMixin, ListView):
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Personal notifications merged with course announcement feeds; keyset
+        # pages, so deep pages cost the same as the first
+        page, previous_cursor, next_cursor = feed.inbox_page(self.request.user, self.request.GET.get('cursor'))
+        context['notifications'] = context['object_list'] = page
+        context['previous_url'] = self._page_url(previous_cursor)
+        context['next_url'] = self._page_url(next_cursor)
+        return context
+
+    def _page_url(self, cursor):
+        if cursor is None:
+            return None
+        query = self.request.GET.copy()
+        query['cursor'] = cursor
+        return f"{self.request.path}?{query.urlencode()}"
+
 class MarkNotificationRead(LoginRequiredMixin, View):
     def get(self, request, pk):
         notification = get_object_or_404(Notification, pk=pk, user=request.user)
-        notification.is_read = True
-        notification.save()
-        
+        unread.mark_read(request.user, notification.pk)
+
         # Redirect to the link if it exists, otherwise back to inbox
         if notification.link:
             return redirect(notification.link)
         return redirect('inbox')
 
+class MarkAnnouncementRead(LoginRequiredMixin, View):
+    """Feed announcements (fan-out on read): advances the course's read cursor."""
+    def get(self, request, pk):
+        announcement = get_object_or_404(feed.feed_announcements(request.user), pk=pk)
+        feed.mark_announcement_seen(request.user, announcement)
+        unread.invalidate_feed_unread(request.user.pk)
+        return redirect('course-detail', pk=announcement.course_id)
+
 class MarkAllRead(LoginRequiredMixin, View):
     def get(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        unread.mark_all_read(request.user)
+        feed.mark_all_seen(request.user)
+        unread.invalidate_feed_unread(request.user.pk)
         return redirect('inbox')
 
 # --- ANNOUNCEMENTS (INSTRUCTOR) ---
@@ -46,9 +73,28 @@ class AnnouncementCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView
         return super().form_valid(form)
 
     def get_success_url(self):
-        return reverse('course-detail', kwargs={'pk': self.course.id})
+        # Delivery runs in the background; the instructor follows it here
+        return reverse('announcement-status', kwargs={'pk': self.object.pk})
 
     def test_func(self):
         # Only the instructor can post
         course = get_object_or_404(Course, pk=self.kwargs['course_id'])
-        return self.request.user == course.instructor
\ No newline at end of file
+        return self.request.user == course.instructor
+
+class AnnouncementStatusView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    """Delivery progress of an announcement (see communications/delivery.py)."""
+    model = Announcement
+    template_name = 'communications/announcement_status.html'
+    context_object_name = 'announcement'
+
+    def get_queryset(self):
+        return Announcement.objects.select_related('course')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['in_progress'] = self.object.status in (Announcement.PENDING, Announcement.SENDING)
+        return context
+
+    def test_func(self):
+        # Only the course's instructor follows delivery
+        return self.get_object().course.instructor_id == self.request.user.id
@@ -40,6 +40,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # Outermost after CORS so session/auth queries count too
+    'courses.querycount.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,6 +66,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'communications.context_processors.unread_notifications',
             ],
         },
     },
@@ -86,6 +89,36 @@ DATABASES = {
 }
 
 
+# Cache (catalog reads, answer keys, quiz papers, enrollment sets).
+# CACHE_BACKEND is 'locmem' (per process, the default), 'file' or 'redis';
+# CACHE_LOCATION is the directory for 'file' and the redis:// URL for 'redis'.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'apilearn'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.getenv('CACHE_BACKEND', 'locmem')]
+CACHES = {
+    'default': {
+        'BACKEND': _cache_backend,
+        'LOCATION': os.getenv('CACHE_LOCATION', _cache_location),
+        'KEY_PREFIX': 'apilearn',
+        'TIMEOUT': 300,
+    }
+}
+if 'redis' not in _cache_backend:
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+# Whether every process sees the same cache. With locmem a version bump or an
+# invalidation only reaches the process that made it, so per-process copies
+# (answer keys, enrollment sets) are kept for seconds instead of hours.
+CACHE_IS_SHARED = 'locmem' not in _cache_backend
+
+# Seconds a catalog entry (course list, facets, categories, course card,
+# curriculum outline) is served before one worker refreshes it; writes
+# invalidate earlier through version bumps (courses/caching.py)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -131,6 +164,12 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Certificates and lesson PDFs are authorized in Django, then handed to the
+# front server: 'django' (dev), 'x-accel-redirect' (nginx) or 'x-sendfile'.
+PROTECTED_FILE_BACKEND = os.getenv('PROTECTED_FILE_BACKEND', 'django')
+# nginx `internal` location that aliases MEDIA_ROOT (x-accel-redirect only)
+PROTECTED_FILE_INTERNAL_URL = os.getenv('PROTECTED_FILE_INTERNAL_URL', '/protected-media/')
+
 
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -144,6 +183,9 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny', # Open by default, lock specific views later
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Keyset pagination on (created_at, id) for every list endpoint
+    'DEFAULT_PAGINATION_CLASS': 'courses.pagination.CreatedCursorPagination',
+    'PAGE_SIZE': 20,
 }
 
 from datetime import timedelta
@@ -201,6 +243,76 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # EMAIL_HOST_PASSWORD = os.getenv('EMAIL_PASS')
 
 SITE_NAME = 'ApiLearn'
+# Absolute base URL used for links in emails and certificates
+SITE_URL = os.getenv('SITE_URL', 'http://127.0.0.1:8000')
+
+# Certificates are rendered by `manage.py render_certificates`
+CERTIFICATE_RENDER_WORKERS = int(os.getenv('CERTIFICATE_RENDER_WORKERS', '0')) or None  # None = CPU count
+
+# Announcements are delivered by `manage.py deliver_announcements`: students
+# are processed CHUNK_SIZE at a time, emailed in BCC batches of MAIL_BATCH_SIZE
+ANNOUNCEMENT_CHUNK_SIZE = int(os.getenv('ANNOUNCEMENT_CHUNK_SIZE', '1000'))
+ANNOUNCEMENT_MAIL_BATCH_SIZE = int(os.getenv('ANNOUNCEMENT_MAIL_BATCH_SIZE', '50'))
+# 'push': one Notification row per enrolled student; 'feed': the announcement
+# alone, merged into inboxes at read time (communications/feed.py)
+ANNOUNCEMENT_DELIVERY = os.getenv('ANNOUNCEMENT_DELIVERY', 'push')
+
+# Transactional email is queued in the outbox and sent by `manage.py send_outbox_emails`
+# (communications/outbox.py); an email is given up after OUTBOX_MAX_ATTEMPTS tries
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '6'))
+
+# Hourly/daily notification digests are queued by `manage.py send_digests <frequency>`
+# (communications/digests.py): DIGEST_BATCH_SIZE users per batch, DIGEST_WORKERS batches at a time
+DIGEST_BATCH_SIZE = int(os.getenv('DIGEST_BATCH_SIZE', '1000'))
+DIGEST_WORKERS = int(os.getenv('DIGEST_WORKERS', '4'))
+
+# Part of every ETag (courses/conditional.py); set it per release so clients
+# revalidating after a template/serializer change get the new payload
+ETAG_SALT = os.getenv('APP_RELEASE', '')
+
+# Max SQL queries per request, by (URL name, method) (see courses/querycount.py),
+# for a signed-in user on a cold cache. Signed-in HTML pages spend up to 5 of
+# them on the session, the user and the navbar badge (unread counter,
+# enrollments, feed count); most are cached after the first request.
+# Exceeding one logs a warning; with QUERY_BUDGET_STRICT (always on in tests
+# using QueryBudgetTestMixin) the request fails instead.
+QUERY_BUDGETS = {
+    ('course-list', 'GET'): 7,
+    ('course-detail', 'GET'): 9,
+    ('student-dashboard', 'GET'): 8,
+    ('instructor-dashboard', 'GET'): 8,
+    ('inbox', 'GET'): 7,
+    ('take-quiz', 'GET'): 8,
+    ('take-quiz', 'POST'): 9,
+    ('api-course-list', 'GET'): 6,
+    ('api-course-detail', 'GET'): 4,
+    ('api-course-search', 'GET'): 6,
+    ('api-course-facets', 'GET'): 3,
+    ('api-course-outline', 'GET'): 3,
+    ('api-category-list', 'GET'): 3,
+    ('api-lesson-list', 'GET'): 4,
+    ('api-lesson-detail', 'GET'): 4,
+    ('api-quiz-list', 'GET'): 4,
+    ('api-quiz-detail', 'GET'): 4,
+    ('api-quiz-paper', 'GET'): 6,
+    ('api-enrollment-list', 'GET'): 4,
+    ('api-quiz-attempt-list', 'GET'): 4,
+}
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Completion pipeline timings, background workers, etc.
+        'courses': {'handlers': ['console'], 'level': os.getenv('APP_LOG_LEVEL', 'INFO')},
+        'communications': {'handlers': ['console'], 'level': os.getenv('APP_LOG_LEVEL', 'INFO')},
+    },
+}
 
 PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
 PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY')
@@ -6,9 +6,9 @@ from rest_framework.routers import DefaultRouter
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from djoser.views import UserViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from users.views import register, activate_account, dashboard, student_dashboard, instructor_dashboard
+from users.views import register, activate_account, dashboard, student_dashboard, instructor_dashboard, edit_profile
 from django.contrib.auth.views import LoginView, LogoutView
-from courses.views import CourseListView, CourseViewSet, CategoryViewSet, LessonViewSet, QuizViewSet, EnrollmentViewSet
+from courses.views import CourseListView, CourseViewSet, CategoryViewSet, LessonViewSet, QuizViewSet, EnrollmentViewSet, QuizAttemptViewSet
 
 # API Router
 router = DefaultRouter()
@@ -17,6 +17,7 @@ router.register(r'categories', CategoryViewSet, basename='api-category')
 router.register(r'lessons', LessonViewSet, basename='api-lesson')
 router.register(r'quizzes', QuizViewSet, basename='api-quiz')
 router.register(r'enrollments', EnrollmentViewSet, basename='api-enrollment')
+router.register(r'quiz-attempts', QuizAttemptViewSet, basename='api-quiz-attempt')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,6 +29,7 @@ urlpatterns = [
     path('dashboard/', dashboard, name='dashboard'),
     path('dashboard/student/', student_dashboard, name='student-dashboard'),
     path('dashboard/instructor/', instructor_dashboard, name='instructor-dashboard'),
+    path('profile/edit/', edit_profile, name='edit-profile'),
 
     # Auth Pages
     path('register/', register, name='register'),
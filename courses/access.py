@@ -0,0 +1,57 @@
+# courses/access.py
+"""
+Access context for course content.
+
+Permission checks on a Course, Lesson or Quiz only need three facts: which
+course it belongs to, who teaches that course and whether the user is
+enrolled. `with_access` annotates a queryset with all three so the object
+and its access context arrive in the same SELECT; `resolve_access` reads
+those annotations, or fetches them with one query for objects loaded
+elsewhere.
+"""
+from collections import namedtuple
+
+from django.db.models import Exists, F, OuterRef, Value
+
+from .enrollments import is_enrolled
+from .models import Course, Enrollment, Lesson, Quiz
+
+AccessContext = namedtuple('AccessContext', ['course_id', 'instructor_id', 'is_enrolled'])
+
+# model -> (course id path, instructor id path)
+ACCESS_PATHS = {
+    Course: ('pk', 'instructor_id'),
+    Lesson: ('course_id', 'course__instructor_id'),
+    Quiz: ('lesson__course_id', 'lesson__course__instructor_id'),
+}
+
+
+def with_access(queryset, user):
+    """Annotate a Course/Lesson/Quiz queryset with access_course_id, access_instructor_id and access_is_enrolled."""
+    course_path, instructor_path = ACCESS_PATHS[queryset.model]
+    if getattr(user, 'is_authenticated', False):
+        enrolled = Exists(Enrollment.objects.filter(student_id=user.pk, course_id=OuterRef(course_path)))
+    else:
+        enrolled = Value(False)
+    return queryset.annotate(
+        access_course_id=F(course_path),
+        access_instructor_id=F(instructor_path),
+        access_is_enrolled=enrolled,
+    )
+
+
+def resolve_access(user, obj):
+    """AccessContext for a Course, Lesson or Quiz; at most one query."""
+    if hasattr(obj, 'access_course_id'):
+        return AccessContext(obj.access_course_id, obj.access_instructor_id, obj.access_is_enrolled)
+
+    if isinstance(obj, Course):
+        # Course and instructor are on the row already; enrollment comes from the cache
+        return AccessContext(obj.pk, obj.instructor_id, is_enrolled(user, obj.pk))
+
+    row = (
+        with_access(type(obj)._default_manager.filter(pk=obj.pk), user)
+        .values_list('access_course_id', 'access_instructor_id', 'access_is_enrolled')
+        .first()
+    )
+    return AccessContext(*row) if row else AccessContext(None, None, False)
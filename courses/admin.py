@@ -1,6 +1,10 @@
 # courses/admin.py
 from django.contrib import admin
+from django.db.models import Q
 from .models import Course, Category
+from . import search
+
+ADMIN_SEARCH_LIMIT = 1000
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -12,6 +16,13 @@ class CourseAdmin(admin.ModelAdmin):
     list_display = ('title', 'instructor', 'price', 'is_published', 'created_at')
     list_filter = ('is_published', 'category')
     search_fields = ('title', 'description', 'instructor__username')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Title/description/lesson matches come from the full-text index instead of icontains scans
+        if not search_term or not search.is_indexed():
+            return super().get_search_results(request, queryset, search_term)
+        course_ids = search.matching_course_ids(search_term, limit=ADMIN_SEARCH_LIMIT)
+        return queryset.filter(Q(pk__in=course_ids) | Q(instructor__username__icontains=search_term)), False
 from .models import Course, Category, Lesson, Quiz, Question, Answer, QuizAttempt
 
 class AnswerInline(admin.TabularInline):
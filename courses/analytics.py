@@ -0,0 +1,117 @@
+# courses/analytics.py
+"""
+Item analysis for quizzes (classical test theory).
+
+All attempts of a quiz are loaded as one attempts x questions matrix and
+every statistic is computed with NumPy array operations:
+
+- difficulty      share of attempts that answered the question correctly
+- discrimination  corrected point-biserial correlation between getting the
+                  question right and the score on the *other* questions
+- distractors     how often each answer option (and "no answer") was chosen
+"""
+import numpy as np
+
+from .models import Answer, QuizAttempt
+
+
+def _attempt_matrix(quiz, answers):
+    """
+    Returns (chosen, correct): int16 matrix of chosen option index (-1 = no
+    answer) and a bool matrix of correct answers, both attempts x questions.
+    `answers` is the quiz's answer table sorted by answer id.
+    """
+    packed, lengths = [], []
+    for data in QuizAttempt.objects.filter(quiz=quiz).exclude(responses=None).values_list('responses', flat=True).iterator():
+        packed.append(bytes(data))
+        lengths.append(len(data) // 4)
+
+    n_attempts = len(packed)
+    n_questions = int(answers['column'].max()) + 1 if len(answers) else 0
+    chosen = np.full((n_attempts, n_questions), -1, dtype=np.int16)
+    correct = np.zeros((n_attempts, n_questions), dtype=bool)
+    if not n_attempts or not n_questions:
+        return chosen, correct
+
+    answer_ids = np.frombuffer(b''.join(packed), dtype='<u4').astype(np.int64)
+    rows = np.repeat(np.arange(n_attempts), lengths)
+
+    # Map every answer id to its row in the answer table; drop answers deleted since
+    idx = np.searchsorted(answers['id'], answer_ids)
+    idx = np.clip(idx, 0, len(answers) - 1)
+    known = answers['id'][idx] == answer_ids
+    rows, idx = rows[known], idx[known]
+
+    columns = answers['column'][idx]
+    chosen[rows, columns] = answers['option'][idx]
+    correct[rows, columns] = answers['is_correct'][idx]
+    return chosen, correct
+
+
+def _answer_table(quiz):
+    """The quiz's questions and answers as NumPy arrays, questions in paper order."""
+    rows = list(
+        Answer.objects.filter(question__quiz=quiz)
+        .order_by('question__order', 'question_id', 'id')
+        .values_list('id', 'question_id', 'question__text', 'text', 'is_correct')
+    )
+
+    questions, columns, options = [], [], []
+    column_of, option_count = {}, {}
+    for _, question_id, question_text, _, _ in rows:
+        if question_id not in column_of:
+            column_of[question_id] = len(questions)
+            questions.append({'question_id': question_id, 'text': question_text, 'options': []})
+        column = column_of[question_id]
+        columns.append(column)
+        options.append(option_count.get(column, 0))
+        option_count[column] = option_count.get(column, 0) + 1
+
+    table = np.zeros(len(rows), dtype=[('id', np.int64), ('column', np.int32), ('option', np.int16), ('is_correct', bool)])
+    table['id'] = [row[0] for row in rows]
+    table['column'] = columns
+    table['option'] = options
+    table['is_correct'] = [row[4] for row in rows]
+
+    for (answer_id, _, _, text, is_correct), column in zip(rows, columns):
+        questions[column]['options'].append({'answer_id': answer_id, 'text': text, 'is_correct': is_correct})
+
+    return np.sort(table, order='id'), questions
+
+
+def item_analysis(quiz):
+    """Per-question difficulty, discrimination and option frequencies for a quiz."""
+    answers, questions = _answer_table(quiz)
+    chosen, correct = _attempt_matrix(quiz, answers)
+    n_attempts, n_questions = correct.shape
+
+    report = {'quiz_id': quiz.id, 'attempts': n_attempts, 'questions': questions}
+    if not n_questions:
+        return report
+
+    scores = correct.astype(np.float64)
+    difficulty = scores.mean(axis=0) if n_attempts else np.zeros(n_questions)
+
+    # Corrected item-total correlation: item vs. total score without that item
+    rest = scores.sum(axis=1, keepdims=True) - scores
+    item_dev = scores - scores.mean(axis=0)
+    rest_dev = rest - rest.mean(axis=0)
+    denominator = np.sqrt((item_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        discrimination = np.where(denominator > 0, (item_dev * rest_dev).sum(axis=0) / denominator, np.nan)
+
+    # Option frequencies: shift by one so "no answer" (-1) lands in bucket 0
+    max_options = int(answers['option'].max()) + 2
+    flat = (np.arange(n_questions) * max_options + chosen + 1).ravel()
+    counts = np.bincount(flat, minlength=n_questions * max_options).reshape(n_questions, max_options)
+
+    for column, question in enumerate(questions):
+        question['difficulty'] = round(float(difficulty[column]), 4)
+        question['discrimination'] = None if np.isnan(discrimination[column]) else round(float(discrimination[column]), 4)
+        question['unanswered'] = int(counts[column, 0])
+        for option_index, option in enumerate(question['options']):
+            count = int(counts[column, option_index + 1])
+            option['count'] = count
+            option['share'] = round(count / n_attempts, 4) if n_attempts else 0.0
+
+    return report
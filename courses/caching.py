@@ -0,0 +1,276 @@
+# courses/caching.py
+"""
+Versioned cache for published-catalog reads.
+
+Entries live under version-stamped keys:
+
+    catalog:<catalog version>:<name>:<digest>                    course list, facets, categories
+    course:<id>:<course version>.<catalog version>:<name>:<digest> course card, curriculum outline
+
+Course and Category writes bump the catalog version, Course and Lesson (and
+Quiz) writes bump that course's version (see courses/signals.py), so readers
+move on to fresh keys and stale entries simply age out. Bumps wait for the
+transaction to commit, and each version is bumped once per transaction
+however many rows a bulk write touches (`collect_on_commit`). Versions are
+seeded from the clock, so an evicted counter never comes back to a version
+that was used before; quiz versions (courses/grading.py) use the same
+`current_version`/`bump_version` helpers.
+
+Stampedes: an entry is stored with a soft expiry some time before the
+backend drops it. The first worker to see an expired (or missing) entry takes
+a short `cache.add` lock and recomputes; the others keep serving the old
+value, or, when there is none yet, wait briefly for the lock holder. This
+works on every backend that implements `add`; it is atomic on local-memory
+and Redis and best effort on the file backend.
+
+Hits, stale hits, misses and waits are counted per entry name in the process
+and added to shared counters every STATS_FLUSH_EVERY events and at exit;
+`stats()` (the catalog_cache_stats command) reads them. With the local-memory
+backend both the cache and the counters are per process.
+"""
+import atexit
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Lesson
+
+CATALOG_VERSION_KEY = 'catalog:version'
+LOCK_TIMEOUT = 30  # seconds a recompute may hold the lock
+LOCK_WAIT = 2.0  # seconds a worker waits for someone else's recompute
+LOCK_POLL = 0.025
+STALE_GRACE = 60  # seconds a soft-expired entry may still be served while it is refreshed
+STATS_FLUSH_EVERY = 50
+STATS_PREFIX = 'catalog-stats'
+STAT_KINDS = ('hit', 'stale', 'miss', 'wait')
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+# --- Versions -----------------------------------------------------------
+
+def current_version(key):
+    """
+    The version stored under `key`. Seeded from the clock, so an evicted
+    counter never falls back to a version that was used before.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def _course_version_key(course_id):
+    return f'course:{course_id}:version'
+
+
+def catalog_version():
+    return current_version(CATALOG_VERSION_KEY)
+
+
+def course_version(course_id):
+    return current_version(_course_version_key(course_id))
+
+
+_on_commit = threading.local()
+
+
+def collect_on_commit(flush, item):
+    """
+    Add `item` to a set that is passed to `flush(items)` when the current
+    transaction commits (at once outside a transaction). All the items a
+    transaction collects for the same `flush` arrive in a single call.
+    """
+    if not hasattr(_on_commit, 'sets'):
+        _on_commit.sets = {}
+    _on_commit.sets.setdefault(flush, set()).add(item)
+
+    def run():
+        items = _on_commit.sets.pop(flush, None)
+        if items:
+            flush(items)
+
+    # Later callbacks of the same transaction find the set already flushed
+    transaction.on_commit(run)
+
+
+def _bump_all(keys):
+    for key in keys:
+        _bump(key)
+
+
+def bump_version(key):
+    """Bump the version under `key` once the current transaction commits."""
+    collect_on_commit(_bump_all, key)
+
+
+def bump_catalog():
+    """After commit, so readers during the transaction keep caching committed data under the old version."""
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def bump_course(course_id):
+    bump_version(_course_version_key(course_id))
+
+
+def _digest(parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def catalog_key(name, *parts):
+    """Key for a catalog-wide entry; `parts` (e.g. the request URL) are hashed into it."""
+    return f'catalog:{catalog_version()}:{name}:{_digest(parts)}'
+
+
+def course_key(course_id, name, *parts):
+    """Key for a per-course entry; it changes with the course and with the catalog (category titles)."""
+    return f'course:{course_id}:{course_version(course_id)}.{catalog_version()}:{name}:{_digest(parts)}'
+
+
+def _name(key):
+    return key.split(':')[2 if key.startswith('catalog:') else 3]
+
+
+# --- Hit/miss counters --------------------------------------------------
+
+_stats_lock = threading.Lock()
+_pending = Counter()
+
+
+def _record(name, kind):
+    with _stats_lock:
+        _pending[(name, kind)] += 1
+        if sum(_pending.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+    _flush(pending)
+
+
+def _flush(pending):
+    for (name, kind), count in pending.items():
+        key = f'{STATS_PREFIX}:{name}:{kind}'
+        if not cache.add(key, count, None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, None)
+    names = {name for name, _ in pending}
+    known = cache.get(f'{STATS_PREFIX}:names') or set()
+    if not names <= known:
+        cache.set(f'{STATS_PREFIX}:names', known | names, None)
+
+
+def flush_stats():
+    with _stats_lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if pending:
+        _flush(pending)
+
+
+@atexit.register
+def _flush_stats_at_exit():
+    try:
+        flush_stats()
+    except Exception:
+        # The cache may already be unreachable while the process shuts down
+        pass
+
+
+def stats():
+    """{name: {'hit', 'stale', 'miss', 'wait', 'ratio'}} from the shared counters (this process flushed first)."""
+    flush_stats()
+
+    names = sorted(cache.get(f'{STATS_PREFIX}:names') or ())
+    keys = [f'{STATS_PREFIX}:{name}:{kind}' for name in names for kind in STAT_KINDS]
+    values = cache.get_many(keys)
+    report = {}
+    for name in names:
+        row = {kind: values.get(f'{STATS_PREFIX}:{name}:{kind}', 0) for kind in STAT_KINDS}
+        served = row['hit'] + row['stale'] + row['miss']
+        row['ratio'] = (row['hit'] + row['stale']) / served if served else 0.0
+        report[name] = row
+    return report
+
+
+def reset_stats():
+    with _stats_lock:
+        _pending.clear()
+    names = cache.get(f'{STATS_PREFIX}:names') or ()
+    cache.delete_many([f'{STATS_PREFIX}:{name}:{kind}' for name in names for kind in STAT_KINDS])
+    cache.delete(f'{STATS_PREFIX}:names')
+
+
+# --- Reads --------------------------------------------------------------
+
+def _store(key, value, timeout):
+    cache.set(key, (value, time.time() + timeout), timeout + STALE_GRACE)
+
+
+def get_or_set(key, compute, timeout=None):
+    """
+    The cached value for `key`, or `compute()` stored for `timeout` seconds
+    (settings.CATALOG_CACHE_TIMEOUT by default). Only one worker at a time
+    recomputes a key; see the module docstring.
+    """
+    timeout = timeout or _timeout()
+    name = _name(key)
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until:
+            _record(name, 'hit')
+            return value
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # Someone else is refreshing it
+            _record(name, 'stale')
+            return value
+    elif not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        _record(name, 'wait')
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL)
+            entry = cache.get(key)
+            if entry is not None:
+                _record(name, 'hit')
+                return entry[0]
+        # The lock holder is slow or gone: compute without the lock
+        _record(name, 'miss')
+        value = compute()
+        _store(key, value, timeout)
+        return value
+
+    _record(name, 'miss')
+    try:
+        value = compute()
+        _store(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+def course_outline(course_id):
+    """The course's lessons in order with their quiz joined, only the columns a curriculum shows."""
+    return get_or_set(course_key(course_id, 'outline'), lambda: list(
+        Lesson.objects.filter(course_id=course_id).select_related('quiz').only(
+            'id', 'course_id', 'title', 'order', 'lesson_type', 'video_url', 'pdf_file', 'quiz__id',
+        )
+    ))
@@ -0,0 +1,146 @@
+# courses/catalog.py
+"""
+Catalog filters and facet counts.
+
+Supported query parameters (API and HTML catalog alike):
+
+    category    category slug (or id)
+    price       'free' | 'paid'
+    instructor  instructor user id
+    recency     '7d' | '30d' | '90d' | '365d'  (created within that window)
+
+`facet_counts` returns the number of courses per facet value for the
+filtered result set. All facets come from one GROUP BY over
+(category, free/paid, instructor, age bucket); the per-facet totals are
+summed up in Python from those groups.
+"""
+from datetime import timedelta
+
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.utils import timezone
+
+PRICE_FREE = 'free'
+PRICE_PAID = 'paid'
+
+# Recency filter values, narrowest first: value -> (days, label)
+RECENCY = {
+    '7d': (7, 'Last 7 days'),
+    '30d': (30, 'Last 30 days'),
+    '90d': (90, 'Last 3 months'),
+    '365d': (365, 'Last year'),
+}
+
+FILTER_PARAMS = ('category', 'price', 'instructor', 'recency')
+
+
+def parse_filters(params):
+    """The recognised, valid filters from a QueryDict/dict; anything else is ignored."""
+    filters = {}
+
+    category = (params.get('category') or '').strip()
+    if category:
+        filters['category'] = category
+
+    if params.get('price') in (PRICE_FREE, PRICE_PAID):
+        filters['price'] = params['price']
+
+    instructor = params.get('instructor')
+    if instructor and str(instructor).isdigit():
+        filters['instructor'] = int(instructor)
+
+    if params.get('recency') in RECENCY:
+        filters['recency'] = params['recency']
+
+    return filters
+
+
+def filter_courses(queryset, filters):
+    if 'category' in filters:
+        category = filters['category']
+        queryset = queryset.filter(category_id=int(category)) if category.isdigit() else queryset.filter(category__slug=category)
+    if filters.get('price') == PRICE_FREE:
+        queryset = queryset.filter(price=0)
+    elif filters.get('price') == PRICE_PAID:
+        queryset = queryset.filter(price__gt=0)
+    if 'instructor' in filters:
+        queryset = queryset.filter(instructor_id=filters['instructor'])
+    if 'recency' in filters:
+        days, _ = RECENCY[filters['recency']]
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=days))
+    return queryset
+
+
+def facet_counts(queryset):
+    """
+    {'category': [...], 'price': [...], 'instructor': [...], 'recency': [...]}
+    for the courses in `queryset`, each a list of {'value', 'label', 'count'}.
+    """
+    now = timezone.now()
+    windows = list(RECENCY.items())
+    age_bucket = Case(
+        *[When(created_at__gte=now - timedelta(days=days), then=Value(index)) for index, (_, (days, _)) in enumerate(windows)],
+        default=Value(len(windows)),
+        output_field=IntegerField(),
+    )
+    is_free = Case(When(price=0, then=Value(1)), default=Value(0), output_field=IntegerField())
+
+    groups = (
+        queryset.order_by()
+        .values('category__slug', 'category__title', 'instructor_id', 'instructor__full_name', 'instructor__username')
+        .annotate(is_free=is_free, age_bucket=age_bucket)
+        .annotate(total=Count('pk'))
+    )
+
+    categories, instructors, free_paid, buckets = {}, {}, {0: 0, 1: 0}, [0] * (len(windows) + 1)
+    for row in groups:
+        total = row['total']
+        if row['category__slug']:
+            label, count = categories.get(row['category__slug'], (row['category__title'], 0))
+            categories[row['category__slug']] = (label, count + total)
+        name = row['instructor__full_name'] or row['instructor__username']
+        label, count = instructors.get(row['instructor_id'], (name, 0))
+        instructors[row['instructor_id']] = (label, count + total)
+        free_paid[row['is_free']] += total
+        buckets[row['age_bucket']] += total
+
+    def facet(values):
+        return sorted(
+            ({'value': value, 'label': label, 'count': count} for value, (label, count) in values.items()),
+            key=lambda item: (-item['count'], str(item['label'])),
+        )
+
+    # Age buckets are disjoint; a recency window includes every narrower bucket
+    recency, running = [], 0
+    for index, (value, (_, label)) in enumerate(windows):
+        running += buckets[index]
+        recency.append({'value': value, 'label': label, 'count': running})
+
+    return {
+        'category': facet(categories),
+        'price': [
+            {'value': PRICE_FREE, 'label': 'Free', 'count': free_paid[1]},
+            {'value': PRICE_PAID, 'label': 'Paid', 'count': free_paid[0]},
+        ],
+        'instructor': facet(instructors),
+        'recency': recency,
+    }
+
+
+def facet_links(facets, params):
+    """
+    Adds `query` (the query string that toggles this value, other filters and
+    the search kept) and `active` to every facet value, for the HTML catalog.
+    """
+    for name, values in facets.items():
+        for item in values:
+            query = params.copy()
+            # A new filter starts the list over
+            query.pop('cursor', None)
+            query.pop('page', None)
+            item['active'] = str(params.get(name, '')) == str(item['value'])
+            if item['active']:
+                query.pop(name, None)
+            else:
+                query[name] = str(item['value'])
+            item['query'] = query.urlencode()
+    return facets
@@ -0,0 +1,85 @@
+# courses/certificates.py
+"""
+Certificate rendering queue.
+
+Certificates are created in the PENDING state and rendered by the
+`render_certificates` management command, which fans the work out to a pool
+of worker processes. Web requests only queue work; a download of a PDF that
+is not ready yet answers 202 with Retry-After.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Certificate
+from .utils import certificate_render_args, render_certificate_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def queue_certificate(certificate):
+    """Mark a certificate for (re)rendering by the worker."""
+    certificate.status = Certificate.PENDING
+    certificate.error = ''
+    certificate.save(update_fields=['status', 'error'])
+    return certificate
+
+
+def make_render_pool(workers):
+    # 'spawn' keeps forked children from sharing the parent's DB connection
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+RENDER_FIELDS = ['pdf_file', 'status', 'rendered_at', 'template_version', 'error']
+
+
+def render_batch(pool, certificates):
+    """
+    Render `certificates` (with student/course loaded) on `pool` and save the
+    results with a single bulk_update. Returns (rendered, failed) counts.
+    """
+    jobs = {}
+    for cert in certificates:
+        args = certificate_render_args(cert)
+        jobs[pool.submit(render_certificate_pdf, **args)] = (cert, args['template_version'])
+
+    rendered = failed = 0
+    for future in as_completed(jobs):
+        cert, template_version = jobs[future]
+        try:
+            cert.pdf_file = future.result()
+            cert.status = Certificate.READY
+            cert.rendered_at = timezone.now()
+            cert.template_version = template_version
+            cert.error = ''
+            rendered += 1
+        except Exception as exc:
+            logger.exception("Certificate %s failed to render", cert.id)
+            cert.status = Certificate.FAILED
+            cert.error = str(exc)
+            failed += 1
+
+    Certificate.objects.bulk_update([cert for cert, _ in jobs.values()], RENDER_FIELDS)
+    return rendered, failed
+
+
+def render_pending_certificates(pool, batch_size=100):
+    """
+    Render one batch of queued certificates on `pool`.
+    Returns (rendered, failed) counts; (0, 0) means the queue is empty.
+    """
+    batch = list(
+        Certificate.objects.filter(status=Certificate.PENDING)
+        .select_related('student', 'course')
+        .order_by('issued_at')[:batch_size]
+    )
+    if not batch:
+        return 0, 0
+    return render_batch(pool, batch)
+
+
+def default_worker_count():
+    return getattr(settings, 'CERTIFICATE_RENDER_WORKERS', None) or multiprocessing.cpu_count()
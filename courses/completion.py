@@ -0,0 +1,78 @@
+# courses/completion.py
+"""
+Course completion pipeline.
+
+The CourseProgress read model tells us on which toggle a student reached
+100%. That toggle schedules exactly one evaluation after the transaction
+commits, which fires the ordered `course_completed` event. Receivers
+(certificate issuance, completion email, ...) are connected in
+courses/signals.py and run in connection order.
+"""
+import functools
+import logging
+import time
+
+from django.db import transaction
+from django.dispatch import Signal
+
+from .models import CourseProgress
+
+logger = logging.getLogger(__name__)
+
+# Sent once per completion with `event=CompletionEvent(...)`
+course_completed = Signal()
+
+
+class CompletionEvent:
+    """
+    Shared state handed to every course_completed receiver.
+    Earlier receivers may attach results (e.g. the certificate) for later ones.
+    """
+    def __init__(self, progress):
+        self.progress = progress
+        self.student = progress.student
+        self.course = progress.course
+        self.certificate = None
+        self.certificate_created = False
+        self.timings = {}
+
+
+def schedule_completion(progress_id):
+    """Evaluate completion once the current transaction commits."""
+    transaction.on_commit(lambda: evaluate_completion(progress_id))
+
+
+def evaluate_completion(progress_id):
+    """
+    Fire course_completed if the stored progress is still complete.
+    Returns the CompletionEvent, or None when nothing was sent.
+    """
+    started = time.perf_counter()
+    progress = CourseProgress.objects.select_related('student', 'course').filter(pk=progress_id).first()
+    if progress is None or not progress.is_complete:
+        return None
+
+    event = CompletionEvent(progress)
+    course_completed.send(sender=CourseProgress, event=event)
+
+    event.timings['total'] = (time.perf_counter() - started) * 1000
+    logger.info(
+        "Course completion for student=%s course=%s took %.1fms (%s)",
+        progress.student_id, progress.course_id, event.timings['total'],
+        ", ".join(f"{name}={ms:.1f}ms" for name, ms in event.timings.items() if name != 'total'),
+    )
+    return event
+
+
+def timed(name):
+    """Decorator for course_completed receivers that records their duration on the event."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(sender, event, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(sender, event=event, **kwargs)
+            finally:
+                event.timings[name] = (time.perf_counter() - started) * 1000
+        return wrapper
+    return decorator
@@ -0,0 +1,90 @@
+# courses/conditional.py
+"""
+Conditional GET: ETag / Last-Modified validators and 304 Not Modified.
+
+Validators come from timestamps the database already keeps, so answering a
+revalidation costs one small query instead of building the page or payload:
+
+- a course    its updated_at (also touched when one of its lessons or quizzes
+              changes, or its instructor's name or avatar, see
+              courses/signals.py) and its category's updated_at
+- a lesson    its updated_at
+- a list      row count plus the latest updated_at of the listed rows (the
+              count catches deletions, which leave no timestamp behind)
+
+ETags also cover the full URL (filters, cursor, search terms) and
+settings.ETAG_SALT, which a deploy changes whenever templates or serializers
+do. Responses carry `Cache-Control: private, no-cache`: clients may keep them
+but revalidate on every use.
+
+HTML pages are only made conditional for anonymous visitors with no pending
+messages; signed-in pages carry per-user state (progress, CSRF forms).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(request, *parts):
+    raw = '|'.join(str(part) for part in (getattr(settings, 'ETAG_SALT', ''), request.get_full_path(), *parts))
+    return '"%s"' % hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def conditional(request, render, etag, last_modified=None):
+    """
+    Return 304 when the request's If-None-Match / If-Modified-Since still
+    match `etag` / `last_modified`; otherwise `render()` the full response.
+    Validator headers are added to 200 and 304 responses.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Cookie', 'Authorization'))
+    return response
+
+
+def is_conditional_page(request):
+    """HTML pages: only anonymous visitors without flash messages waiting to be shown."""
+    return not request.user.is_authenticated and not len(get_messages(request))
+
+
+# --- Validators ---------------------------------------------------------
+
+def course_validators(courses, pk):
+    """
+    (etag parts, last_modified) for the course `pk` as seen through `courses`,
+    or None when it is not in there (the view then answers 404 as usual).
+    """
+    try:
+        row = courses.order_by().filter(pk=pk).values_list('updated_at', 'category_id', 'category__updated_at').first()
+    except (TypeError, ValueError):
+        return None
+    if row is None:
+        return None
+    updated_at, _, category_updated_at = row
+    return row, max(filter(None, (updated_at, category_updated_at)))
+
+
+def catalog_validators(courses):
+    """Changes when a listed course (or its lessons, quizzes, category) changes, or one is added or removed."""
+    return tuple(courses.order_by().aggregate(
+        count=Count('pk'),
+        categorised=Count('category'),
+        latest=Max('updated_at'),
+        category_latest=Max('category__updated_at'),
+    ).values())
+
+
+def list_validators(queryset):
+    """(count, latest updated_at) of the rows in `queryset`."""
+    return tuple(queryset.order_by().aggregate(count=Count('pk'), latest=Max('updated_at')).values())
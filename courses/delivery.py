@@ -0,0 +1,161 @@
+# courses/delivery.py
+"""
+Protected file delivery.
+
+Views do the authorization check, then call `serve_protected_file`. The
+configured backend decides who moves the bytes:
+
+- 'django'            FileResponse from Python (development default), with
+                      ETag / Last-Modified / 304 and single-range 206 support.
+- 'x-accel-redirect'  nginx serves the file from an `internal` location.
+- 'x-sendfile'        Apache (mod_xsendfile) / lighttpd serve the file.
+
+The front-server backends never touch the disk from Python; the front server
+handles conditional requests and Range itself.
+
+Set PROTECTED_FILE_BACKEND to one of the names above or a dotted path to a
+class implementing `serve(request, fieldfile, content_type, filename)`.
+"""
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.utils.module_loading import import_string
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def _content_disposition(filename, inline=True):
+    kind = 'inline' if inline else 'attachment'
+    return f"{kind}; filename*=UTF-8''{quote(filename)}"
+
+
+class DjangoFileBackend:
+    """Streams the file from Python. Fine for development and small deployments."""
+
+    def serve(self, request, fieldfile, content_type, filename):
+        path = fieldfile.path
+        stat = os.stat(path)  # raises FileNotFoundError; one syscall instead of exists()+open()
+
+        etag = f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = int(stat.st_mtime)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self._file_response(request, path, stat.st_size, content_type, etag, last_modified)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = 'private, no-cache'
+        response['Content-Disposition'] = _content_disposition(filename)
+        return response
+
+    def _file_response(self, request, path, size, content_type, etag, last_modified):
+        byte_range = self._requested_range(request, size, etag, last_modified)
+        if byte_range is None:
+            return FileResponse(open(path, 'rb'), content_type=content_type)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        start, end = byte_range
+        response = StreamingHttpResponse(self._read_range(path, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        return response
+
+    def _requested_range(self, request, size, etag, last_modified):
+        """
+        Returns (start, end) for a satisfiable single range, False for an
+        unsatisfiable one, or None to send the whole file.
+        """
+        header = request.META.get('HTTP_RANGE', '').strip()
+        match = RANGE_RE.match(header)
+        if not match or request.method not in ('GET', 'HEAD'):
+            return None
+
+        # If-Range: only honour the range if the validator still matches
+        if_range = request.META.get('HTTP_IF_RANGE', '').strip()
+        if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                return False
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            return False
+        return start, end
+
+    def _read_range(self, path, start, end):
+        with open(path, 'rb') as fh:
+            fh.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = fh.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class XAccelRedirectBackend:
+    """
+    nginx: map PROTECTED_FILE_INTERNAL_URL to MEDIA_ROOT in an internal location, e.g.
+
+        location /protected-media/ { internal; alias /srv/apilearn/media/; }
+    """
+
+    def serve(self, request, fieldfile, content_type, filename):
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.PROTECTED_FILE_INTERNAL_URL + fieldfile.name)
+        response['Content-Disposition'] = _content_disposition(filename)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class XSendfileBackend:
+    """Apache mod_xsendfile / lighttpd: the front server reads the absolute path."""
+
+    def serve(self, request, fieldfile, content_type, filename):
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fieldfile.path
+        response['Content-Disposition'] = _content_disposition(filename)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+BACKENDS = {
+    'django': DjangoFileBackend,
+    'x-accel-redirect': XAccelRedirectBackend,
+    'x-sendfile': XSendfileBackend,
+}
+
+def get_backend():
+    name = settings.PROTECTED_FILE_BACKEND
+    backend_class = BACKENDS.get(name) or import_string(name)
+    return backend_class()
+
+
+def serve_protected_file(request, fieldfile, content_type='application/octet-stream', filename=None):
+    """
+    Hand an already-authorized FieldFile to the configured delivery backend.
+    May raise FileNotFoundError when Python serves the file itself.
+    """
+    return get_backend().serve(request, fieldfile, content_type, filename or os.path.basename(fieldfile.name))
@@ -0,0 +1,70 @@
+# courses/enrollments.py
+"""
+Per-user enrollment membership, cached.
+
+Each user's enrolled course ids are kept in the shared cache as one set, so
+"is this user enrolled?" is a cache read instead of an EXISTS query on every
+lesson/quiz request. Enrollment create/delete signals drop the user's entry
+(see courses/signals.py); the next check rebuilds it with one query.
+
+Those invalidations only reach other processes through a shared cache. With
+settings.CACHE_IS_SHARED off (locmem), entries live UNSHARED_TIMEOUT seconds,
+and a course missing from the set is confirmed against the database, so a
+student who has just enrolled is never turned away by a stale set.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Enrollment
+
+ENROLLMENTS_TIMEOUT = 60 * 60
+UNSHARED_TIMEOUT = 10
+
+
+def _timeout():
+    return ENROLLMENTS_TIMEOUT if getattr(settings, 'CACHE_IS_SHARED', False) else UNSHARED_TIMEOUT
+
+
+def _cache_key(user_id):
+    return f'user:{user_id}:enrolled-courses'
+
+
+def enrolled_course_ids(user):
+    """Frozenset of the course ids `user` (a user or a user id) is enrolled in."""
+    user_id = getattr(user, 'pk', user)
+    if user_id is None:
+        return frozenset()
+
+    key = _cache_key(user_id)
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = frozenset(Enrollment.objects.filter(student_id=user_id).values_list('course_id', flat=True))
+        cache.set(key, course_ids, _timeout())
+    return course_ids
+
+
+def is_enrolled(user, course):
+    """`course` may be a Course or a course id. Anonymous users are never enrolled."""
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    course_id = getattr(course, 'pk', course)
+    if course_id in enrolled_course_ids(user):
+        return True
+    if getattr(settings, 'CACHE_IS_SHARED', False):
+        return False
+    # The set may predate an enrollment made in another process
+    if Enrollment.objects.filter(student_id=user.pk, course_id=course_id).exists():
+        invalidate_enrollments(user.pk)
+        return True
+    return False
+
+
+def invalidate_enrollments(user_id):
+    """
+    Forget a user's cached enrollments. Dropped now and again after commit, so
+    a request that read the old rows mid-transaction cannot leave them cached.
+    """
+    key = _cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,173 @@
+# courses/grading.py
+"""
+Compiled answer keys for quiz grading.
+
+A quiz's answer key (question id -> correct answer ids, question count and
+pass score) is compiled once and kept both in this process and in the shared
+cache. Keys are versioned per quiz; saving or deleting a Quiz, Question or
+Answer bumps the version (see courses/signals.py), so stale keys are never
+read again. Grading a submission is then a dictionary lookup per answer.
+
+Version bumps only reach other processes through a shared cache. When
+settings.CACHE_IS_SHARED is off (locmem), every process compiles its own
+keys and recompiles them after LOCAL_TTL seconds, so an edited answer is
+graded correctly everywhere within that time.
+"""
+import struct
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import bump_version, collect_on_commit, current_version
+from .models import Question, Quiz
+
+KEY_TIMEOUT = 60 * 60 * 24
+LOCAL_MAX_ENTRIES = 512
+# Seconds a process trusts its own compiled key when the cache is not shared
+LOCAL_TTL = 5
+
+# quiz_id -> (version, AnswerKey, compiled at (monotonic))
+_local_keys = {}
+
+
+class AnswerKey:
+    def __init__(self, quiz_id, version, pass_score, correct, options):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.pass_score = pass_score
+        # question_id -> frozenset of correct answer ids
+        self.correct = correct
+        # question_id -> frozenset of every answer id of that question
+        self.options = options
+
+    @property
+    def question_count(self):
+        return len(self.correct)
+
+    def grade(self, submitted):
+        """
+        `submitted` maps question id -> chosen answer id (ints or strings).
+        Returns (correct_count, score_percent, passed).
+        """
+        correct_count = 0
+        for question_id, answer_id in submitted.items():
+            try:
+                if int(answer_id) in self.correct.get(int(question_id), ()):
+                    correct_count += 1
+            except (TypeError, ValueError):
+                continue
+
+        score = (correct_count / self.question_count) * 100 if self.question_count > 0 else 0
+        return correct_count, score, score >= self.pass_score
+
+    def chosen_answers(self, submitted):
+        """The submitted answer ids that really belong to their question, in question order."""
+        chosen = []
+        for question_id, answer_id in submitted.items():
+            try:
+                question_id, answer_id = int(question_id), int(answer_id)
+            except (TypeError, ValueError):
+                continue
+            if answer_id in self.options.get(question_id, ()):
+                chosen.append((question_id, answer_id))
+        return [answer_id for _, answer_id in sorted(chosen)]
+
+    def to_cache(self):
+        return {
+            'pass_score': self.pass_score,
+            'correct': {question_id: sorted(ids) for question_id, ids in self.correct.items()},
+            'options': {question_id: sorted(ids) for question_id, ids in self.options.items()},
+        }
+
+    @classmethod
+    def from_cache(cls, quiz_id, version, data):
+        correct = {question_id: frozenset(ids) for question_id, ids in data['correct'].items()}
+        options = {question_id: frozenset(ids) for question_id, ids in data['options'].items()}
+        return cls(quiz_id, version, data['pass_score'], correct, options)
+
+
+def pack_responses(answer_ids):
+    """Chosen answer ids as a packed little-endian uint32 array (4 bytes per answer)."""
+    return struct.pack(f'<{len(answer_ids)}I', *answer_ids)
+
+
+def unpack_responses(data):
+    return list(struct.unpack(f'<{len(data) // 4}I', bytes(data))) if data else []
+
+
+def _version_key(quiz_id):
+    return f'quiz:{quiz_id}:version'
+
+
+def quiz_version(quiz_id):
+    """Current version of a quiz's derived data (answer key, shuffled paper)."""
+    return current_version(_version_key(quiz_id))
+
+
+def bump_quiz_version(quiz_id):
+    """Once the transaction commits; a bulk import of many questions bumps its quiz once."""
+    bump_version(_version_key(quiz_id))
+
+
+def _bump_versions_for_questions(question_ids):
+    for quiz_id in set(Question.objects.filter(pk__in=question_ids).values_list('quiz_id', flat=True)):
+        bump_quiz_version(quiz_id)
+
+
+def bump_quiz_version_for_question(question_id):
+    """For Answer writes: the questions' quizzes are looked up with one query at commit."""
+    collect_on_commit(_bump_versions_for_questions, question_id)
+
+
+def compile_answer_key(quiz_id, version):
+    """Builds the answer key with two small queries. Returns None if the quiz does not exist."""
+    pass_score = Quiz.objects.filter(pk=quiz_id).values_list('pass_score', flat=True).first()
+    if pass_score is None:
+        return None
+
+    correct, options = {}, {}
+    rows = Question.objects.filter(quiz_id=quiz_id).values_list('id', 'answers__id', 'answers__is_correct')
+    for question_id, answer_id, is_correct in rows:
+        correct.setdefault(question_id, set())
+        options.setdefault(question_id, set())
+        if answer_id is not None:
+            options[question_id].add(answer_id)
+            if is_correct:
+                correct[question_id].add(answer_id)
+
+    return AnswerKey(
+        quiz_id, version, pass_score,
+        {q: frozenset(a) for q, a in correct.items()},
+        {q: frozenset(a) for q, a in options.items()},
+    )
+
+
+def get_answer_key(quiz_id):
+    """
+    Answer key for a quiz: from this process, else the shared cache, else the
+    database. Returns None if the quiz does not exist.
+    """
+    version = quiz_version(quiz_id)
+    shared = getattr(settings, 'CACHE_IS_SHARED', False)
+
+    local = _local_keys.get(quiz_id)
+    if local and local[0] == version and (shared or time.monotonic() - local[2] < LOCAL_TTL):
+        return local[1]
+
+    cache_key = f'quiz:{quiz_id}:answer-key:{version}'
+    # An unshared cache may hold a key compiled before another process's edit
+    data = cache.get(cache_key) if shared else None
+    if data is not None:
+        answer_key = AnswerKey.from_cache(quiz_id, version, data)
+    else:
+        answer_key = compile_answer_key(quiz_id, version)
+        if answer_key is None:
+            return None
+        if shared:
+            cache.set(cache_key, answer_key.to_cache(), KEY_TIMEOUT)
+
+    if len(_local_keys) >= LOCAL_MAX_ENTRIES:
+        _local_keys.clear()
+    _local_keys[quiz_id] = (version, answer_key, time.monotonic())
+    return answer_key
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from courses.utils import certificate_verify_url, render_certificate_pdf
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark: per-certificate render time and output size of certificate PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500, help="Certificates rendered.")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        issued_at = timezone.now()
+        verify_url = certificate_verify_url()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "certificate.pdf")
+            # Warm-up
+            render_certificate_pdf(path, "Warm Up", "Warm Up", issued_at, "warm-up", verify_url)
+
+            started = time.perf_counter()
+            total_bytes = 0
+            for i in range(count):
+                render_certificate_pdf(
+                    path, f"Student Number {i}", "Building REST APIs with Django",
+                    issued_at, str(uuid.uuid4()), verify_url,
+                )
+                total_bytes += os.path.getsize(path)
+            elapsed = time.perf_counter() - started
+
+            self.stdout.write(
+                f"{elapsed / count * 1000:.2f} ms/cert, "
+                f"{total_bytes / count:.0f} bytes/cert ({count} certificates)"
+            )
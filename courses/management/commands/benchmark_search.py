@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from courses import search
+from courses.models import Category, Course, Lesson
+
+TOPICS = (
+    "python django rest api testing async database postgres sqlite caching queue celery docker deploy "
+    "security auth token react javascript typescript css design figma marketing finance excel data "
+    "science pandas numpy machine learning statistics cloud aws linux networking git career writing"
+).split()
+
+QUERIES = ["django", "rest api", "machine learning", "pyth", "docker deploy cloud", "finance excel", "zzzunmatched"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark course search on a synthetic catalog: full-text index vs. icontains scans. "
+        "Everything runs in a transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=100_000)
+        parser.add_argument('--lessons-per-course', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=20, help="Runs per query.")
+
+    def handle(self, *args, **options):
+        if not search.is_indexed():
+            raise CommandError("This database has no full-text index to benchmark.")
+
+        with transaction.atomic():
+            self._seed(options['courses'], options['lessons_per_course'])
+
+            started = time.perf_counter()
+            search.rebuild_index()
+            self.stdout.write(f"Index built in {time.perf_counter() - started:.1f}s")
+
+            published = Course.objects.filter(is_published=True)
+            self.stdout.write(f"{'query':>22} {'matches':>8} {'fts p50':>9} {'fts p95':>9} {'icontains':>10}")
+            for query in QUERIES:
+                fts = self._time(lambda: search.search_courses(query, published, limit=20), options['repeat'])
+                count = search.search_courses(query, published, limit=20).count
+                scan = self._time(lambda: list(search._fallback(published, search._tokens(query))[:20]), 3)
+                self.stdout.write(
+                    f"{query:>22} {count:>8} {fts[0]:>7.1f}ms {fts[1]:>7.1f}ms {scan[0]:>8.1f}ms"
+                )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count, lessons_per_course):
+        rng = random.Random(42)
+        # Filler vocabulary plus a couple of topic words per course, so queries are selective
+        filler = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9))) for _ in range(5000)]
+        words = lambda n: ' '.join(rng.choice(filler) for _ in range(n))
+
+        def text(n, topics):
+            return ' '.join([words(n), *topics])
+
+        instructor = get_user_model().objects.create_user(username='benchmark-search-instructor', password=None)
+        categories = Category.objects.bulk_create(
+            Category(title=f"{word.title()} Topics", slug=f"benchmark-{word}") for word in TOPICS[:12]
+        )
+
+        started = time.perf_counter()
+        for start in range(0, count, 5000):
+            batch = [rng.sample(TOPICS, 2) for _ in range(min(5000, count - start))]
+            courses = Course.objects.bulk_create(
+                Course(
+                    instructor=instructor, category=rng.choice(categories), title=text(3, topics).title(),
+                    description=text(40, topics), is_published=rng.random() < 0.9,
+                )
+                for topics in batch
+            )
+            Lesson.objects.bulk_create(
+                Lesson(course=course, title=text(4, topics[:1]).title(), order=order, text_content=text(120, topics))
+                for course, topics in zip(courses, batch) for order in range(lessons_per_course)
+            )
+        self.stdout.write(f"Seeded {count} courses in {time.perf_counter() - started:.1f}s")
+
+    def _time(self, run, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from courses import caching
+
+
+class Command(BaseCommand):
+    help = "Show catalog cache hit/miss counters per entry (course-list, facets, card, outline, ...)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them.")
+
+    def handle(self, *args, **options):
+        report = caching.stats()
+        if not report:
+            self.stdout.write("No catalog cache activity recorded (the local-memory cache is per process).")
+        else:
+            self.stdout.write(f"{'entry':<16}{'hit':>10}{'stale':>10}{'miss':>10}{'wait':>10}{'hit ratio':>12}")
+            for name, row in report.items():
+                self.stdout.write(
+                    f"{name:<16}{row['hit']:>10}{row['stale']:>10}{row['miss']:>10}{row['wait']:>10}{row['ratio']:>11.1%}"
+                )
+        if options['reset']:
+            caching.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,37 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from courses import quiz_import
+from courses.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Bulk-import a CSV or JSON question bank into a quiz (see courses/quiz_import.py for the format)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('path', help="CSV or JSON file.")
+        parser.add_argument('--format', choices=['csv', 'json'], default=None,
+                            help="Defaults to the file extension.")
+        parser.add_argument('--replace', action='store_true',
+                            help="Replace the quiz's existing questions instead of appending.")
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz_id'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Quiz {options['quiz_id']} does not exist")
+
+        fmt = options['format'] or ('json' if os.path.splitext(options['path'])[1].lower() == '.json' else 'csv')
+        with open(options['path'], encoding='utf-8-sig') as fh:
+            text = fh.read()
+
+        mode = quiz_import.REPLACE if options['replace'] else quiz_import.APPEND
+        try:
+            created = quiz_import.import_questions(quiz, quiz_import.parse_bank(text, fmt), mode)
+        except quiz_import.QuizImportError as exc:
+            for error in exc.errors:
+                self.stderr.write(f"Row {error['row']}: {error['error']}")
+            raise CommandError(f"Import aborted: {exc}. Nothing was written.")
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} questions into '{quiz.title}' ({mode})."))
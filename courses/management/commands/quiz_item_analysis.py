@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from courses.analytics import item_analysis
+from courses.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Print difficulty, discrimination and option frequencies for every question of a quiz."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('--json', action='store_true', help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz_id'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Quiz {options['quiz_id']} does not exist")
+
+        report = item_analysis(quiz)
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"'{quiz.title}': {report['attempts']} attempts with recorded responses")
+        for number, question in enumerate(report['questions'], start=1):
+            discrimination = question.get('discrimination')
+            self.stdout.write(
+                f"\nQ{number}. {question['text']}\n"
+                f"    difficulty {question.get('difficulty', 0):.2f}  "
+                f"discrimination {'n/a' if discrimination is None else f'{discrimination:+.2f}'}  "
+                f"unanswered {question.get('unanswered', 0)}"
+            )
+            for option in question['options']:
+                marker = '*' if option['is_correct'] else ' '
+                self.stdout.write(f"    {marker} {option.get('count', 0):>6}  {option['text']}")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from courses.models import Course
+from courses.progress import rebuild_course_progress
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CourseProgress read model from LessonProgress rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help="Only rebuild this course ID (can be repeated).")
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('id')
+        if options['courses']:
+            courses = courses.filter(id__in=options['courses'])
+
+        total = 0
+        for course_id in courses.values_list('id', flat=True).iterator():
+            written = rebuild_course_progress(course_id)
+            total += written
+            self.stdout.write(f"Course {course_id}: {written} progress rows rebuilt")
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} progress rows rebuilt."))
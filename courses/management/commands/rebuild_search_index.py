@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from courses import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text course search index from Course, Category and Lesson rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=search.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not search.is_indexed():
+            raise CommandError("This database has no full-text index; search falls back to icontains matching.")
+
+        total = search.rebuild_index(
+            options['batch_size'],
+            progress=lambda done: self.stdout.write(f"{done} courses indexed"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} courses indexed."))
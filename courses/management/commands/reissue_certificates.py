@@ -0,0 +1,116 @@
+import json
+import os
+import uuid
+from datetime import datetime, time as dt_time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from courses.certificates import default_worker_count, make_render_pool, render_batch
+from courses.models import Certificate
+from courses.utils import CERTIFICATE_TEMPLATE_VERSION
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render existing certificate PDFs (e.g. after a design or domain change). "
+        "Progress is checkpointed so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help="Only certificates for this course ID (can be repeated).")
+        parser.add_argument('--issued-from', help="Only certificates issued on/after this date (YYYY-MM-DD).")
+        parser.add_argument('--issued-to', help="Only certificates issued on/before this date (YYYY-MM-DD).")
+        parser.add_argument('--stale-only', action='store_true',
+                            help=f"Skip certificates already rendered with template version {CERTIFICATE_TEMPLATE_VERSION}.")
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--checkpoint', default=os.path.join(settings.MEDIA_ROOT, 'certificates', '.reissue-checkpoint.json'),
+                            help="File used to record progress.")
+        parser.add_argument('--restart', action='store_true', help="Delete an existing checkpoint and start over.")
+
+    def handle(self, *args, **options):
+        filters = {
+            'courses': sorted(options['courses'] or []),
+            'issued_from': options['issued_from'],
+            'issued_to': options['issued_to'],
+            'stale_only': options['stale_only'],
+        }
+
+        queryset = Certificate.objects.select_related('student', 'course').order_by('pk')
+        if filters['courses']:
+            queryset = queryset.filter(course_id__in=filters['courses'])
+        if filters['issued_from']:
+            queryset = queryset.filter(issued_at__gte=self._parse_date(filters['issued_from'], dt_time.min))
+        if filters['issued_to']:
+            queryset = queryset.filter(issued_at__lte=self._parse_date(filters['issued_to'], dt_time.max))
+        if filters['stale_only']:
+            queryset = queryset.exclude(template_version=CERTIFICATE_TEMPLATE_VERSION)
+
+        checkpoint = self._load_checkpoint(options['checkpoint'], filters, options['restart'])
+        if checkpoint['last_pk']:
+            queryset = queryset.filter(pk__gt=checkpoint['last_pk'])
+            self.stdout.write(f"Resuming after {checkpoint['last_pk']} ({checkpoint['done']} already done)")
+
+        workers = options['workers'] or default_worker_count()
+        batch_size = options['batch_size']
+        self.stdout.write(f"Re-issuing certificates with {workers} workers...")
+
+        with make_render_pool(workers) as pool:
+            batch = []
+            for cert in queryset.iterator(chunk_size=batch_size):
+                batch.append(cert)
+                if len(batch) >= batch_size:
+                    self._flush(pool, batch, checkpoint, options['checkpoint'])
+                    batch = []
+            if batch:
+                self._flush(pool, batch, checkpoint, options['checkpoint'])
+
+        # Finished cleanly: the next run starts from scratch
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {checkpoint['done']} certificates re-issued, {checkpoint['failed']} failed."
+        ))
+
+    def _flush(self, pool, batch, checkpoint, path):
+        rendered, failed = render_batch(pool, batch)
+        checkpoint['last_pk'] = batch[-1].pk
+        checkpoint['done'] += rendered
+        checkpoint['failed'] += failed
+        self._save_checkpoint(path, checkpoint)
+        self.stdout.write(f"{checkpoint['done']} re-issued, {checkpoint['failed']} failed")
+
+    def _parse_date(self, value, at):
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+        return timezone.make_aware(datetime.combine(day, at))
+
+    def _load_checkpoint(self, path, filters, restart):
+        fresh = {'filters': filters, 'last_pk': None, 'done': 0, 'failed': 0}
+        if restart and os.path.exists(path):
+            # Drop the old run now, so an interruption before the first batch can't resume it
+            os.remove(path)
+        if not os.path.exists(path):
+            return fresh
+        with open(path) as fh:
+            checkpoint = json.load(fh)
+        if checkpoint.get('filters') != filters:
+            raise CommandError(
+                f"Checkpoint {path} was written for different filters {checkpoint.get('filters')}; "
+                "use --restart or --checkpoint to start a new run."
+            )
+        # Certificate ids are UUIDs; JSON holds them as text
+        if checkpoint['last_pk']:
+            checkpoint['last_pk'] = uuid.UUID(checkpoint['last_pk'])
+        return checkpoint
+
+    def _save_checkpoint(self, path, checkpoint):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as fh:
+            json.dump({**checkpoint, 'last_pk': str(checkpoint['last_pk'])}, fh)
+        os.replace(tmp_path, path)
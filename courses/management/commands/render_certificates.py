@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from courses.certificates import default_worker_count, make_render_pool, render_pending_certificates
+from courses.models import Certificate
+
+
+class Command(BaseCommand):
+    help = "Worker that renders queued certificate PDFs on a pool of processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Number of render processes (default: CERTIFICATE_RENDER_WORKERS or CPU count).")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the queue and exit instead of polling forever.")
+        parser.add_argument('--retry-failed', action='store_true',
+                            help="Also pick up certificates that previously failed.")
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or default_worker_count()
+        if options['retry_failed']:
+            requeued = Certificate.objects.filter(status=Certificate.FAILED).update(status=Certificate.PENDING, error='')
+            self.stdout.write(f"Re-queued {requeued} failed certificates")
+
+        self.stdout.write(f"Rendering certificates with {workers} workers...")
+        with make_render_pool(workers) as pool:
+            while True:
+                rendered, failed = render_pending_certificates(pool, options['batch_size'])
+                if rendered or failed:
+                    self.stdout.write(f"Rendered {rendered}, failed {failed}")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS("Certificate queue drained."))
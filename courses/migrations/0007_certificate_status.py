@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+
+def mark_rendered_ready(apps, schema_editor):
+    Certificate = apps.get_model('courses', 'Certificate')
+    Certificate.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).update(status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_courseprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='rendered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], db_index=True, default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_rendered_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_certificate_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='template_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
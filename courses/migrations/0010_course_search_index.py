@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# Full-text index for course search (see courses/search.py). Not a Django
+# model: SQLite gets an FTS5 virtual table keyed by the course id (rowid),
+# PostgreSQL a weighted tsvector column with a GIN index. Other databases
+# fall back to icontains search and get no table.
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS courses_search USING fts5(
+    title, description, category, lessons,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+"""
+
+POSTGRES_CREATE = [
+    """
+    CREATE TABLE IF NOT EXISTS courses_search (
+        course_id integer PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS courses_search_document_idx ON courses_search USING GIN (document)",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE)
+    elif vendor == 'postgresql':
+        for statement in POSTGRES_CREATE:
+            schema_editor.execute(statement)
+
+
+SQLITE_INSERT = (
+    "INSERT INTO courses_search (rowid, title, description, category, lessons) VALUES (%s, %s, %s, %s, %s)"
+)
+
+POSTGRES_INSERT = """
+INSERT INTO courses_search (course_id, document) VALUES (
+    %s,
+    setweight(to_tsvector('english', %s), 'A') ||
+    setweight(to_tsvector('english', %s), 'C') ||
+    setweight(to_tsvector('english', %s), 'B') ||
+    setweight(to_tsvector('english', %s), 'D')
+)
+"""
+
+
+def fill_search_index(apps, schema_editor):
+    # Index the courses that already exist; later writes keep it current. A
+    # frozen copy of courses.search._documents/_write, so later changes to
+    # that module or the models don't change what this migration does.
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        insert = SQLITE_INSERT
+    elif connection.vendor == 'postgresql':
+        insert = POSTGRES_INSERT
+    else:
+        return
+
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    db = connection.alias
+
+    lessons = {}
+    rows = (
+        Lesson.objects.using(db).order_by('course_id', 'order', 'id')
+        .values_list('course_id', 'title', 'description', 'text_content')
+    )
+    for course_id, title, description, text in rows.iterator():
+        lessons.setdefault(course_id, []).extend(part for part in (title, description, text) if part)
+
+    documents = [
+        (course_id, title, description or '', category or '', '\n'.join(lessons.get(course_id, ())))
+        for course_id, title, description, category in
+        Course.objects.using(db).order_by('pk').values_list('id', 'title', 'description', 'category__title')
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM courses_search")
+        cursor.executemany(insert, documents)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute("DROP TABLE IF EXISTS courses_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_quizattempt_responses'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -5,9 +5,11 @@ class Category(models.Model):
     title = models.CharField(max_length=255)
     slug = models.SlugField(unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
+        indexes = [models.Index(fields=['-created_at', '-id'], name='category_recent_idx')]
 
     def __str__(self):
         return self.title
@@ -20,11 +22,21 @@ class Course(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also touched when one of its lessons or quizzes changes (courses/signals.py)
     updated_at = models.DateTimeField(auto_now=True)
     
     # Optional: Course cover image
     image = models.ImageField(upload_to='course_images/', blank=True, null=True)
 
+    class Meta:
+        # Catalog listing/filters (courses/catalog.py): published courses, newest
+        # first, optionally narrowed by category or price
+        indexes = [
+            models.Index(fields=['is_published', '-created_at'], name='course_published_recent_idx'),
+            models.Index(fields=['is_published', 'category', '-created_at'], name='course_published_cat_idx'),
+            models.Index(fields=['is_published', 'price', '-created_at'], name='course_published_price_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -50,9 +62,15 @@ class Lesson(models.Model):
     text_content = models.TextField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order'] # Auto-sort by order number
+        indexes = [
+            models.Index(fields=['course', '-created_at', '-id'], name='lesson_course_recent_idx'),
+            # Curriculum outline pages (OutlineCursorPagination)
+            models.Index(fields=['course', 'order', 'id'], name='lesson_course_order_idx'),
+        ]
 
     def __str__(self):
         return f"{self.order}. {self.title} ({self.course.title})"
@@ -87,6 +105,12 @@ class QuizAttempt(models.Model):
     passed = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    # Chosen answer ids, packed by courses.grading.pack_responses (used for item analysis)
+    responses = models.BinaryField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-timestamp', '-id'], name='attempt_user_recent_idx')]
+
     def __str__(self):
         return f"{self.user} - {self.quiz} - {self.score}%"
 
@@ -97,6 +121,7 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'course') # Prevent double enrollment
+        indexes = [models.Index(fields=['student', '-enrolled_at', '-id'], name='enrollment_student_recent_idx')]
 
     def __str__(self):
         return f"{self.student.username} -> {self.course.title}"
@@ -117,11 +142,55 @@ class LessonProgress(models.Model):
 import uuid
 
 class Certificate(models.Model):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    )
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     issued_at = models.DateTimeField(auto_now_add=True)
     pdf_file = models.FileField(upload_to='certificates/', blank=True, null=True)
 
+    # PDF rendering happens in the render_certificates worker, not the request
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    rendered_at = models.DateTimeField(blank=True, null=True)
+    template_version = models.PositiveIntegerField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
     def __str__(self):
         return f"Certificate: {self.student.username} - {self.course.title}"
+
+
+class CourseProgress(models.Model):
+    """
+    Read model of a student's progress through a course.
+    Maintained incrementally by courses.progress so course pages can
+    read progress with a single indexed lookup instead of counting rows.
+    """
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_progress')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_records')
+    completed_lesson_ids = models.JSONField(default=list, blank=True)
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    percent = models.FloatField(default=0)
+    resume_lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    completed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'course')
+        verbose_name_plural = "Course progress"
+
+    @property
+    def is_complete(self):
+        return self.total_lessons > 0 and self.completed_lessons >= self.total_lessons
+
+    def __str__(self):
+        return f"{self.student.username} - {self.course.title} ({self.percent}%)"
@@ -0,0 +1,60 @@
+# courses/pagination.py
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Each page continues from the timestamp of the previous page's last row
+(DRF's CursorPagination; ties on the timestamp are resolved with a small
+offset and the id orders them). The cost of a page is an index range scan
+however deep the client goes, and no COUNT(*) is run. The page size is
+bounded by MAX_PAGE_SIZE.
+
+The same classes paginate the HTML lists through `cursor_page`, which wraps
+the Django request for DRF.
+"""
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+
+MAX_PAGE_SIZE = 100
+
+
+class CreatedCursorPagination(CursorPagination):
+    """Newest first on (created_at, id); the project default."""
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class EnrolledCursorPagination(CreatedCursorPagination):
+    ordering = ('-enrolled_at', '-id')
+
+
+class AttemptCursorPagination(CreatedCursorPagination):
+    ordering = ('-timestamp', '-id')
+
+
+class OutlineCursorPagination(CreatedCursorPagination):
+    """Curriculum order; outline rows are small, so pages are large."""
+    ordering = ('order', 'id')
+    page_size = MAX_PAGE_SIZE
+
+
+class IdCursorPagination(CreatedCursorPagination):
+    """For models without a timestamp (quizzes)."""
+    ordering = ('-id',)
+
+
+def cursor_page(request, queryset, pagination_class=CreatedCursorPagination, page_size=None):
+    """
+    Paginate a queryset for an HTML view.
+    Returns (items, previous_url, next_url); the urls keep the other query parameters.
+    """
+    paginator = pagination_class()
+    if page_size:
+        paginator.page_size = page_size
+    try:
+        items = paginator.paginate_queryset(queryset, Request(request))
+    except NotFound:
+        raise Http404("Invalid page.")
+    return items, paginator.get_previous_link(), paginator.get_next_link()
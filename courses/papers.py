@@ -0,0 +1,39 @@
+# courses/papers.py
+"""
+Quiz "papers": the student-facing payload of a quiz (ordered questions and
+their answers, without correct flags). A paper is loaded in a fixed number
+of queries and cached per quiz version, and is shared by the HTML quiz page
+and the API.
+"""
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .grading import quiz_version
+from .models import Answer, Question, Quiz
+from .serializers import QuizPaperSerializer
+
+PAPER_TIMEOUT = 60 * 60 * 24
+
+
+def load_quiz_paper(quiz_id):
+    """Quiz + questions + answers in three queries, regardless of size."""
+    quiz = Quiz.objects.prefetch_related(
+        Prefetch('questions', queryset=Question.objects.order_by('order', 'id').prefetch_related(
+            Prefetch('answers', queryset=Answer.objects.order_by('id'))
+        ))
+    ).filter(pk=quiz_id).first()
+    if quiz is None:
+        return None
+    return QuizPaperSerializer(quiz).data
+
+
+def get_quiz_paper(quiz_id):
+    """Cached paper for the current quiz version, or None if the quiz does not exist."""
+    cache_key = f'quiz:{quiz_id}:paper:{quiz_version(quiz_id)}'
+    paper = cache.get(cache_key)
+    if paper is None:
+        paper = load_quiz_paper(quiz_id)
+        if paper is None:
+            return None
+        cache.set(cache_key, paper, PAPER_TIMEOUT)
+    return paper
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .access import resolve_access
+
 class IsCourseOwnerOrReadOnly(permissions.BasePermission):
     """
     Custom permission to only allow owners of an object to edit it.
@@ -11,33 +13,20 @@ class IsCourseOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the owner of the course.
-        return obj.instructor == request.user
-
-from .models import Enrollment
+        return resolve_access(request.user, obj).instructor_id == request.user.id
 
 class IsEnrolledOrInstructor(permissions.BasePermission):
     """
     Allows access only if the user is enrolled OR is the instructor.
     """
     def has_object_permission(self, request, view, obj):
+        # Course, instructor and enrollment for a Course, Lesson or Quiz in one lookup
+        # (free when the viewset queryset was built with courses.access.with_access)
+        access = resolve_access(request.user, obj)
+
         # 1. Instructors can always access their own content
-        # Check if obj is Course, Lesson, or Quiz and trace back to instructor
-        if hasattr(obj, 'instructor'):
-            if obj.instructor == request.user: return True
-        elif hasattr(obj, 'course'):
-            if obj.course.instructor == request.user: return True
-        elif hasattr(obj, 'lesson'):
-             if obj.lesson.course.instructor == request.user: return True
+        if access.instructor_id == request.user.id:
+            return True
 
         # 2. Students must be enrolled
-        # We need to find the Course object depending on what view we are in
-        course = None
-        if hasattr(obj, 'course'):
-            course = obj.course
-        elif hasattr(obj, 'lesson'):
-            course = obj.lesson.course
-        else:
-            course = obj # It is the course itself
-
-        return Enrollment.objects.filter(student=request.user, course=course).exists()
-
+        return access.is_enrolled
@@ -0,0 +1,181 @@
+# courses/progress.py
+"""
+Maintains the CourseProgress read model.
+
+Every LessonProgress toggle updates the (student, course) row in place, and
+lesson/enrollment changes rebuild the affected rows, so pages never have to
+count LessonProgress rows to show a progress bar.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CourseProgress, Enrollment, Lesson, LessonProgress
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _ordered_lesson_ids(course_id):
+    return list(
+        Lesson.objects.filter(course_id=course_id)
+        .order_by('order', 'id')
+        .values_list('id', flat=True)
+    )
+
+
+def _fill(record, lesson_ids, completed):
+    """
+    Recompute every derived field of a CourseProgress row from the course's
+    ordered lesson ids and the set of lesson ids the student has completed.
+    """
+    done = [lesson_id for lesson_id in lesson_ids if lesson_id in completed]
+    record.completed_lesson_ids = done
+    record.completed_lessons = len(done)
+    record.total_lessons = len(lesson_ids)
+    record.percent = round(len(done) / len(lesson_ids) * 100, 1) if lesson_ids else 0
+    record.resume_lesson_id = next((lesson_id for lesson_id in lesson_ids if lesson_id not in completed), None)
+
+    if record.is_complete:
+        record.completed_at = record.completed_at or timezone.now()
+    else:
+        record.completed_at = None
+    return record
+
+
+def record_lesson_progress(student_id, lesson_id, course_id, is_completed):
+    """
+    Apply a single lesson toggle to the student's CourseProgress row.
+    Returns (record, just_completed), where just_completed is True only on the
+    toggle that took the course to 100%.
+    """
+    with transaction.atomic():
+        record, _ = CourseProgress.objects.select_for_update().get_or_create(
+            student_id=student_id, course_id=course_id
+        )
+        was_complete = record.is_complete
+
+        completed = set(record.completed_lesson_ids)
+        if is_completed:
+            completed.add(lesson_id)
+        else:
+            completed.discard(lesson_id)
+
+        _fill(record, _ordered_lesson_ids(course_id), completed)
+        record.save()
+
+    return record, record.is_complete and not was_complete
+
+
+def forget_lesson_progress(student_id, lesson_id, course_id):
+    """
+    Take a deleted LessonProgress off the student's CourseProgress row. Only
+    ever updates: a student without a row (e.g. one being deleted) gets none.
+    """
+    with transaction.atomic():
+        record = CourseProgress.objects.select_for_update().filter(student_id=student_id, course_id=course_id).first()
+        if record is None:
+            return
+        completed = set(record.completed_lesson_ids)
+        completed.discard(lesson_id)
+        _fill(record, _ordered_lesson_ids(course_id), completed)
+        CourseProgress.objects.filter(pk=record.pk).update(
+            completed_lesson_ids=record.completed_lesson_ids,
+            completed_lessons=record.completed_lessons,
+            total_lessons=record.total_lessons,
+            percent=record.percent,
+            resume_lesson_id=record.resume_lesson_id,
+            completed_at=record.completed_at,
+            updated_at=timezone.now(),
+        )
+
+
+def rebuild_course_progress(course_id, student_ids=None):
+    """
+    Recompute CourseProgress rows for a course from LessonProgress.
+    Used when lessons are added, removed or reordered, when a student enrolls,
+    and by the rebuild_course_progress management command.
+    Returns the number of rows written.
+    """
+    lesson_ids = _ordered_lesson_ids(course_id)
+
+    enrolled = Enrollment.objects.filter(course_id=course_id).order_by('student_id')
+    if student_ids is not None:
+        enrolled = enrolled.filter(student_id__in=student_ids)
+    else:
+        # Full rebuild: drop rows for students who are no longer enrolled
+        CourseProgress.objects.filter(course_id=course_id).exclude(
+            student_id__in=Enrollment.objects.filter(course_id=course_id).values('student_id')
+        ).delete()
+
+    written = 0
+    batch = []
+    for student_id in enrolled.values_list('student_id', flat=True).iterator():
+        batch.append(student_id)
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            written += _rebuild_batch(course_id, lesson_ids, batch)
+            batch = []
+    if batch:
+        written += _rebuild_batch(course_id, lesson_ids, batch)
+    return written
+
+
+def _rebuild_batch(course_id, lesson_ids, student_ids):
+    completed = {student_id: set() for student_id in student_ids}
+    rows = LessonProgress.objects.filter(
+        lesson__course_id=course_id, student_id__in=student_ids, is_completed=True
+    ).values_list('student_id', 'lesson_id')
+    for student_id, lesson_id in rows:
+        completed[student_id].add(lesson_id)
+
+    existing = {
+        record.student_id: record
+        for record in CourseProgress.objects.filter(course_id=course_id, student_id__in=student_ids)
+    }
+
+    to_create, to_update = [], []
+    for student_id in student_ids:
+        record = existing.get(student_id)
+        if record is None:
+            to_create.append(_fill(CourseProgress(student_id=student_id, course_id=course_id), lesson_ids, completed[student_id]))
+        else:
+            to_update.append(_fill(record, lesson_ids, completed[student_id]))
+
+    now = timezone.now()
+    for record in to_update:
+        record.updated_at = now
+
+    with transaction.atomic():
+        CourseProgress.objects.bulk_create(to_create, ignore_conflicts=True)
+        CourseProgress.objects.bulk_update(to_update, [
+            'completed_lesson_ids', 'completed_lessons', 'total_lessons',
+            'percent', 'resume_lesson', 'completed_at', 'updated_at',
+        ])
+    return len(to_create) + len(to_update)
+
+
+def preview_course_progress(student, course, lessons):
+    """
+    Progress of a user who is not enrolled (the course's instructor), computed
+    from their LessonProgress and the course's `lessons`, and not stored:
+    the read model only keeps rows for enrollments.
+    """
+    lessons = sorted(lessons, key=lambda lesson: (lesson.order, lesson.id))
+    completed = set(
+        LessonProgress.objects.filter(student=student, lesson__course=course, is_completed=True)
+        .values_list('lesson_id', flat=True)
+    )
+    record = _fill(CourseProgress(student=student, course=course), [lesson.id for lesson in lessons], completed)
+    record.resume_lesson = next((lesson for lesson in lessons if lesson.id == record.resume_lesson_id), None)
+    return record
+
+
+def get_course_progress(student, course):
+    """
+    Single indexed lookup of the student's progress in a course.
+    Builds the row on first access for enrollments that predate the read model.
+    """
+    queryset = CourseProgress.objects.select_related('resume_lesson').filter(student=student, course=course)
+    record = queryset.first()
+    if record is None:
+        rebuild_course_progress(course.id, student_ids=[student.id])
+        record = queryset.first()
+    return record
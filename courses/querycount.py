@@ -0,0 +1,157 @@
+# courses/querycount.py
+"""
+Per-request SQL instrumentation and query budgets.
+
+`QueryCountMiddleware` records every query a request runs (count, total
+database time, repeated statements) through `connection.execute_wrapper`,
+so it works with DEBUG off. The result is:
+
+- attached to the response as `response.query_stats`
+- sent as X-DB-* headers to staff users (and everyone when DEBUG is on)
+- logged on the 'courses.queries' logger, at WARNING when the view's budget
+  is exceeded
+
+Budgets are declared per URL name and method in settings.QUERY_BUDGETS, e.g.
+{('course-detail', 'GET'): 9, ('take-quiz', 'POST'): 9}; a method without
+an entry has no budget. DRF router views are named '<basename>-list' /
+'<basename>-detail' / '<basename>-<action>'. With
+QUERY_BUDGET_STRICT on, an exceeded budget raises QueryBudgetExceeded, which
+is how tests enforce them (see QueryBudgetTestMixin).
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('courses.queries')
+
+# Collapse IN lists / VALUES rows so "same query, different ids" share a fingerprint
+_IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    return _WHITESPACE_RE.sub(' ', _IN_LIST_RE.sub('(...)', sql)).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """{fingerprint: times run} for statements that ran more than once (the usual N+1 signature)."""
+        return {sql: times for sql, times in self.fingerprints.items() if times > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(times - 1 for times in self.duplicates.values())
+
+    def summary(self):
+        return f"{self.count} queries in {self.duration * 1000:.1f}ms ({self.duplicate_count} duplicate)"
+
+
+@contextmanager
+def collect_queries(using=None):
+    """Record the queries run inside the block on every configured database (or just `using`)."""
+    stats = QueryStats()
+    aliases = [using] if using else list(connections)
+    wrappers = [connections[alias].execute_wrapper(stats) for alias in aliases]
+    for wrapper in wrappers:
+        wrapper.__enter__()
+    try:
+        yield stats
+    finally:
+        for wrapper in reversed(wrappers):
+            wrapper.__exit__(None, None, None)
+
+
+def budget_for(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.url_name:
+        return None
+    return getattr(settings, 'QUERY_BUDGETS', {}).get((match.url_name, request.method))
+
+
+class QueryCountMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_queries() as stats:
+            response = self.get_response(request)
+
+        response.query_stats = stats
+        budget = budget_for(request)
+        url_name = getattr(getattr(request, 'resolver_match', None), 'url_name', None) or request.path
+
+        if budget is not None and stats.count > budget:
+            message = f"{request.method} {url_name} ran {stats.summary()}, budget is {budget}"
+            logger.warning(message)
+            for sql, times in sorted(stats.duplicates.items(), key=lambda item: -item[1])[:5]:
+                logger.warning("  %dx %s", times, sql[:300])
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+        else:
+            logger.debug("%s %s ran %s", request.method, url_name, stats.summary())
+
+        if settings.DEBUG or getattr(getattr(request, 'user', None), 'is_staff', False):
+            response['X-DB-Query-Count'] = str(stats.count)
+            response['X-DB-Time-Ms'] = f"{stats.duration * 1000:.1f}"
+            response['X-DB-Duplicate-Queries'] = str(stats.duplicate_count)
+            if budget is not None:
+                response['X-DB-Query-Budget'] = str(budget)
+        return response
+
+
+class QueryBudgetTestMixin:
+    """
+    For django.test.TestCase / APITestCase subclasses. Requests made through
+    the test client fail once a view exceeds its QUERY_BUDGETS entry, and
+    `assertQueryBudget` checks an explicit limit for one request:
+
+        response = self.client.get(url)
+        self.assertQueryBudget(response, 6)
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from django.test.utils import override_settings
+        cls._query_budget_override = override_settings(QUERY_BUDGET_STRICT=True)
+        cls._query_budget_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._query_budget_override.disable()
+        super().tearDownClass()
+
+    def assertQueryBudget(self, response, budget=None):
+        stats = getattr(response, 'query_stats', None)
+        if stats is None:
+            self.fail("Response has no query_stats; is QueryCountMiddleware installed?")
+        if budget is None:
+            budget = budget_for(response.wsgi_request)
+        if budget is not None and stats.count > budget:
+            duplicates = '\n'.join(f"  {times}x {sql}" for sql, times in stats.duplicates.items())
+            self.fail(f"{stats.summary()}, budget is {budget}" + (f"\nRepeated:\n{duplicates}" if duplicates else ""))
+        return stats
@@ -0,0 +1,164 @@
+# courses/quiz_import.py
+"""
+Bulk import of quiz question banks.
+
+Accepted formats (one question per row/object, answers in order):
+
+CSV  header: question,option_1,option_2,...,correct[,order]
+     `correct` is the 1-based number of the correct option.
+
+JSON [{"question": "...", "options": ["A", "B", ...], "correct": 1, "order": 3}, ...]
+     (or {"questions": [...]})
+
+The whole bank is validated in one pass first. Nothing is written unless
+every row is valid; then questions and answers are inserted with two
+bulk_create calls inside a single transaction.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.db.models import Max
+
+from .grading import bump_quiz_version
+from .models import Answer, Question
+
+APPEND = 'append'
+REPLACE = 'replace'
+
+MIN_OPTIONS = 2
+QUESTION_MAX_LENGTH = Question._meta.get_field('text').max_length
+ANSWER_MAX_LENGTH = Answer._meta.get_field('text').max_length
+
+
+class QuizImportError(Exception):
+    """Raised with per-row `errors` when a bank fails validation."""
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+def parse_csv(text):
+    rows = []
+    reader = csv.DictReader(io.StringIO(text))
+    fields = reader.fieldnames or []
+    option_columns = sorted(
+        (name for name in fields if name.startswith('option_')),
+        key=lambda name: int(name.split('_', 1)[1]) if name.split('_', 1)[1].isdigit() else 0,
+    )
+    for record in reader:
+        rows.append({
+            'question': record.get('question'),
+            'options': [record[name] for name in option_columns if (record.get(name) or '').strip()],
+            'correct': record.get('correct'),
+            'order': record.get('order') or None,
+        })
+    return rows
+
+
+def parse_json(text):
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('questions', [])
+    if not isinstance(data, list):
+        raise QuizImportError([{'row': 0, 'error': "Expected a list of questions."}])
+    return data
+
+
+def parse_bank(text, fmt):
+    try:
+        return parse_json(text) if fmt == 'json' else parse_csv(text)
+    except (ValueError, csv.Error) as exc:
+        raise QuizImportError([{'row': 0, 'error': f"Could not parse {fmt.upper()}: {exc}"}])
+
+
+def validate_bank(rows):
+    """
+    Returns a list of cleaned rows (question, options, correct_index, order)
+    or raises QuizImportError listing every invalid row (1-based).
+    """
+    if not rows:
+        raise QuizImportError([{'row': 0, 'error': "The bank contains no questions."}])
+
+    cleaned, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'error': "Expected an object."})
+            continue
+
+        problems = []
+        text = str(row.get('question') or '').strip()
+        options = [str(option).strip() for option in (row.get('options') or []) if str(option).strip()]
+
+        if not text:
+            problems.append("Question text is required.")
+        elif len(text) > QUESTION_MAX_LENGTH:
+            problems.append(f"Question text is longer than {QUESTION_MAX_LENGTH} characters.")
+        if len(options) < MIN_OPTIONS:
+            problems.append(f"At least {MIN_OPTIONS} options are required.")
+        if any(len(option) > ANSWER_MAX_LENGTH for option in options):
+            problems.append(f"Options must be at most {ANSWER_MAX_LENGTH} characters.")
+
+        try:
+            correct = int(row.get('correct'))
+            if not 1 <= correct <= len(options):
+                problems.append(f"'correct' must be between 1 and {len(options)}.")
+        except (TypeError, ValueError):
+            problems.append("'correct' must be the number of the correct option.")
+            correct = None
+
+        order = row.get('order')
+        if order not in (None, ''):
+            try:
+                order = int(order)
+                if order < 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                problems.append("'order' must be a positive whole number.")
+        else:
+            order = None
+
+        if problems:
+            errors.append({'row': number, 'error': " ".join(problems)})
+        else:
+            cleaned.append((text, options, correct - 1, order))
+
+    if errors:
+        raise QuizImportError(errors)
+    return cleaned
+
+
+def import_questions(quiz, rows, mode=APPEND):
+    """
+    Validate `rows` and insert them into `quiz` in one transaction.
+    In REPLACE mode the quiz's existing questions are removed first.
+    Returns the number of questions created.
+    """
+    cleaned = validate_bank(rows)
+
+    with transaction.atomic():
+        if mode == REPLACE:
+            Question.objects.filter(quiz=quiz).delete()
+            next_order = 1
+        else:
+            next_order = (Question.objects.filter(quiz=quiz).aggregate(Max('order'))['order__max'] or 0) + 1
+
+        questions = []
+        for text, _, _, order in cleaned:
+            if order is None:
+                order = next_order
+            next_order = max(next_order, order) + 1
+            questions.append(Question(quiz=quiz, text=text, order=order))
+        questions = Question.objects.bulk_create(questions)
+
+        Answer.objects.bulk_create([
+            Answer(question=question, text=option, is_correct=(index == correct_index))
+            for question, (_, options, correct_index, _) in zip(questions, cleaned)
+            for index, option in enumerate(options)
+        ])
+
+        # bulk_create skips post_save, so invalidate cached keys/papers here
+        transaction.on_commit(lambda: bump_quiz_version(quiz.pk))
+
+    return len(questions)
@@ -0,0 +1,232 @@
+# courses/search.py
+"""
+Full-text course search.
+
+Every course has one row in the `courses_search` index (created by migration
+0010) holding its title, description, category title and the titles/text of
+its lessons:
+
+- SQLite      FTS5 virtual table, ranked with bm25() and per-column weights
+- PostgreSQL  weighted tsvector + GIN index, ranked with ts_rank()
+- others      no index; falls back to icontains matching, unranked
+
+Migration 0010 fills the index with the courses that already exist, and
+rows are refreshed after commit whenever a Course, Lesson or Category
+changes (see courses/signals.py). `rebuild_index` (the rebuild_search_index
+command) repopulates the whole table, e.g. after restoring a backup.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Course, Lesson
+
+SEARCH_TABLE = 'courses_search'
+BATCH_SIZE = 1000
+
+# bm25() weights, in column order: title, description, category, lessons
+SQLITE_WEIGHTS = (10.0, 2.0, 4.0, 1.0)
+POSTGRES_CONFIG = 'english'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SearchResults = namedtuple('SearchResults', ['count', 'courses'])
+
+
+def is_indexed():
+    """True when the database has a full-text index (SQLite FTS5 or PostgreSQL)."""
+    return connection.vendor in ('sqlite', 'postgresql')
+
+
+def _tokens(query):
+    return TOKEN_RE.findall(query or '')[:16]
+
+
+def _fts5_query(tokens):
+    # Quote every term so user input is never parsed as FTS5 syntax; the last
+    # term is a prefix so results follow the user while they type.
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+# --- Building documents -------------------------------------------------
+
+def _documents(course_ids):
+    """(course_id, title, description, category, lessons) for existing courses, two queries."""
+    courses = Course.objects.filter(pk__in=course_ids).values_list('id', 'title', 'description', 'category__title')
+
+    lessons = {}
+    rows = (
+        Lesson.objects.filter(course_id__in=course_ids)
+        .order_by('course_id', 'order', 'id')
+        .values_list('course_id', 'title', 'description', 'text_content')
+    )
+    for course_id, title, description, text in rows:
+        lessons.setdefault(course_id, []).extend(part for part in (title, description, text) if part)
+
+    return [
+        (course_id, title, description or '', category or '', '\n'.join(lessons.get(course_id, ())))
+        for course_id, title, description, category in courses
+    ]
+
+
+def _write(cursor, course_ids, documents):
+    if connection.vendor == 'sqlite':
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})", list(course_ids))
+        cursor.executemany(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, category, lessons) VALUES (%s, %s, %s, %s, %s)",
+            documents,
+        )
+    else:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE course_id = ANY(%s)", [list(course_ids)])
+        cursor.executemany(
+            f"""INSERT INTO {SEARCH_TABLE} (course_id, document) VALUES (
+                %s,
+                setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'A') ||
+                setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'C') ||
+                setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'B') ||
+                setweight(to_tsvector('{POSTGRES_CONFIG}', %s), 'D')
+            )""",
+            documents,
+        )
+
+
+def index_courses(course_ids):
+    """Refresh the index rows of these courses; ids of deleted courses are removed."""
+    course_ids = sorted(set(course_ids))
+    if not course_ids or not is_indexed():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(course_ids), BATCH_SIZE):
+            batch = course_ids[start:start + BATCH_SIZE]
+            _write(cursor, batch, _documents(batch))
+
+
+def schedule_index(course_ids):
+    """Re-index after the surrounding transaction commits (immediately in autocommit)."""
+    course_ids = [course_id for course_id in course_ids if course_id is not None]
+    if course_ids:
+        transaction.on_commit(lambda: index_courses(course_ids))
+
+
+def rebuild_index(batch_size=BATCH_SIZE, progress=None):
+    """Empty and repopulate the whole index. Returns the number of courses indexed."""
+    if not is_indexed():
+        return 0
+
+    done = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        last_id = 0
+        while True:
+            batch = list(Course.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            _write(cursor, batch, _documents(batch))
+            last_id = batch[-1]
+            done += len(batch)
+            if progress:
+                progress(done)
+
+        if connection.vendor == 'sqlite':
+            # Merge the FTS5 b-tree segments written batch by batch
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return done
+
+
+# --- Querying -----------------------------------------------------------
+
+def _ranked_ids(tokens, queryset, limit, offset):
+    """[(course_id, score)] best first, restricted to the courses in `queryset`, plus the total count."""
+    id_column = 'rowid' if connection.vendor == 'sqlite' else 'course_id'
+
+    # Visibility as a correlated EXISTS: one primary-key probe per full-text
+    # match instead of materializing every visible course id per query
+    visible_sql, visible_params = (
+        queryset.order_by().filter(pk=RawSQL(f"{SEARCH_TABLE}.{id_column}", ())).values('pk')
+        .query.sql_with_params()
+    )
+
+    if connection.vendor == 'sqlite':
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        score_sql, score_params = f"-bm25({SEARCH_TABLE}, {weights})", []
+        match_sql, match_params = f"{SEARCH_TABLE} MATCH %s", [_fts5_query(tokens)]
+        limit = -1 if limit is None else limit
+    else:
+        text = ' '.join(tokens)
+        score_sql = f"ts_rank(document, websearch_to_tsquery('{POSTGRES_CONFIG}', %s))"
+        score_params = [text]
+        match_sql, match_params = f"document @@ websearch_to_tsquery('{POSTGRES_CONFIG}', %s)", [text]
+
+    where = f"{match_sql} AND EXISTS ({visible_sql})"
+    where_params = [*match_params, *visible_params]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {id_column}, {score_sql} AS score FROM {SEARCH_TABLE} WHERE {where} "
+            f"ORDER BY score DESC, {id_column} LIMIT %s OFFSET %s",
+            [*score_params, *where_params, limit, offset],
+        )
+        ranked = cursor.fetchall()
+
+        # A short first page already is the whole result
+        if offset == 0 and (limit in (None, -1) or len(ranked) < limit):
+            count = len(ranked)
+        else:
+            cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {where}", where_params)
+            count = cursor.fetchone()[0]
+    return ranked, count
+
+
+def matching_course_ids(query, queryset=None, limit=None):
+    """Ids of matching courses, best first (unranked on databases without an index)."""
+    queryset = Course.objects.all() if queryset is None else queryset
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    if not is_indexed():
+        return list(_fallback(queryset, tokens).values_list('pk', flat=True)[:limit])
+    ranked, _ = _ranked_ids(tokens, queryset, limit, 0)
+    return [course_id for course_id, _ in ranked]
+
+
+def _fallback(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(
+            Q(title__icontains=token) | Q(description__icontains=token) | Q(category__title__icontains=token)
+            | Q(lessons__title__icontains=token) | Q(lessons__text_content__icontains=token)
+        )
+    return queryset.distinct().order_by('-created_at')
+
+
+def search_courses(query, queryset=None, limit=20, offset=0):
+    """
+    Courses from `queryset` (default: all) matching `query`, best match first.
+    Returns SearchResults(count, courses); each course has a `search_score`.
+    """
+    queryset = Course.objects.all() if queryset is None else queryset
+    tokens = _tokens(query)
+    if not tokens:
+        return SearchResults(0, [])
+
+    if not is_indexed():
+        matches = _fallback(queryset, tokens)
+        courses = list(matches[offset:offset + limit])
+        for course in courses:
+            course.search_score = None
+        return SearchResults(matches.count(), courses)
+
+    ranked, count = _ranked_ids(tokens, queryset, limit, offset)
+    by_id = queryset.order_by().in_bulk([course_id for course_id, _ in ranked])
+    courses = []
+    for course_id, score in ranked:
+        course = by_id.get(course_id)
+        if course is not None:
+            course.search_score = score
+            courses.append(course)
+    return SearchResults(count, courses)
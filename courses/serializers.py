@@ -30,6 +30,14 @@ class LessonSerializer(serializers.ModelSerializer):
         model = Lesson
         fields = '__all__'
 
+class LessonOutlineSerializer(serializers.ModelSerializer):
+    """Curriculum row without the lesson body; expects the `has_quiz` annotation (see views.lesson_outline)."""
+    has_quiz = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'course', 'order', 'title', 'lesson_type', 'has_quiz']
+
 class QuizSerializer(serializers.ModelSerializer):
     class Meta:
         model = Quiz
@@ -50,6 +58,13 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = ['id', 'text', 'answers']
 
+class QuizPaperSerializer(serializers.ModelSerializer):
+    """The quiz as a student sees it: ordered questions and their answers (no keys)."""
+    questions = QuestionSerializer(many=True, read_only=True)
+    class Meta:
+        model = Quiz
+        fields = ['id', 'lesson', 'title', 'pass_score', 'questions']
+
 
 class QuizAttemptSerializer(serializers.ModelSerializer):
     class Meta:
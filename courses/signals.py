@@ -1,98 +1,280 @@
+import logging
+
 from django.db.models.signals import pre_save, post_save  # <--- Added post_save here
 from django.dispatch import receiver
-from django.core.mail import send_mail
 from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from communications.digests import email_or_notify
+from communications.outbox import enqueue_email
 from .models import Course, Enrollment
 
-# --- Signal 1: Course Published Notification (Uses pre_save) ---
+logger = logging.getLogger(__name__)
+
+# --- Signal 1: Course Published Notification (flagged in pre_save, queued in post_save) ---
 @receiver(pre_save, sender=Course)
 def course_publish_notification(sender, instance, **kwargs):
+    instance._just_published = None
     if instance.pk: # If updating an existing course
-        try:
-            old_course = Course.objects.get(pk=instance.pk)
-            # Check if it was unpublished AND is now being published
-            if not old_course.is_published and instance.is_published:
-                send_mail(
-                    subject=f"Course Published: {instance.title}",
-                    message=f"Congratulations! Your course '{instance.title}' is now live on ApiLearn.",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[instance.instructor.email],
-                    fail_silently=False,
-                )
-                print(f"📧 EMAIL SENT: Course Published - {instance.title}")
-        except Course.DoesNotExist:
-            pass
+        old = Course.objects.filter(pk=instance.pk).values('is_published', 'updated_at').first()
+        # Check if it was unpublished AND is now being published
+        if old and not old['is_published'] and instance.is_published:
+            instance._just_published = old['updated_at']
+
+@receiver(post_save, sender=Course)
+def queue_course_published_email(sender, instance, **kwargs):
+    unpublished_at = getattr(instance, '_just_published', None)
+    if unpublished_at is None:
+        return
+    instance._just_published = None
+    enqueue_email(
+        subject=f"Course Published: {instance.title}",
+        body=f"Congratulations! Your course '{instance.title}' is now live on ApiLearn.",
+        to=instance.instructor.email,
+        # One email per publish, even if the save is retried
+        dedup_key=f"course-published:{instance.pk}:{unpublished_at.isoformat()}",
+    )
+    logger.info("Queued course published email for course %s", instance.pk)
 
 # --- Signal 2: Enrollment Welcome Email (Uses post_save) ---
 @receiver(post_save, sender=Enrollment)
 def send_enrollment_email(sender, instance, created, **kwargs):
     if created:
-        send_mail(
+        # Digest users get an in-app notification that their next digest picks up
+        email_or_notify(
+            instance.student,
             subject=f"Enrollment Confirmed: {instance.course.title}",
-            message=f"Hi {instance.student.username},\n\nYou have successfully enrolled in {instance.course.title}.\nHappy Learning!",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[instance.student.email],
-            fail_silently=False,
+            body=f"Hi {instance.student.username},\n\nYou have successfully enrolled in {instance.course.title}.\nHappy Learning!",
+            message=f"Enrollment confirmed: {instance.course.title}",
+            link=reverse('course-detail', kwargs={'pk': instance.course_id}),
+            dedup_key=f"enrollment:{instance.pk}",
         )
-        print(f"📧 EMAIL SENT: Enrollment for {instance.student.email}")
+        logger.info("Queued enrollment email for enrollment %s", instance.pk)
 
-from .models import LessonProgress
+# --- Signal 3: Keep the CourseProgress read model in sync ---
+from django.db import transaction
+from django.db.models.signals import post_delete
+from .models import Lesson, LessonProgress, CourseProgress
+from . import progress
+from .completion import schedule_completion
 
 @receiver(post_save, sender=LessonProgress)
-def check_course_completion(sender, instance, **kwargs):
-    if instance.is_completed:
-        # Get all lessons in this course
-        course = instance.lesson.course
-        total_lessons = course.lessons.count()
-        
-        # Count how many this student has finished
-        completed_count = LessonProgress.objects.filter(
-            student=instance.student, 
-            lesson__course=course, 
-            is_completed=True
-        ).count()
-
-        # If 100% complete
-        if total_lessons > 0 and completed_count == total_lessons:
-            send_mail(
-                subject=f"🎉 Course Completed: {course.title}",
-                message=f"Congratulations {instance.student.username}!\n\nYou have finished all lessons in '{course.title}'.\nGreat job!",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[instance.student.email],
-                fail_silently=True,
-            )
-            print(f"📧 EMAIL SENT: Course Completion for {instance.student.email}")
-from .models import LessonProgress, Certificate
-from .utils import generate_certificate_pdf 
+def update_course_progress(sender, instance, **kwargs):
+    record, just_completed = progress.record_lesson_progress(
+        instance.student_id, instance.lesson_id, instance.lesson.course_id, instance.is_completed
+    )
+    if just_completed:
+        schedule_completion(record.pk)
 
-@receiver(post_save, sender=LessonProgress)
-def check_course_completion(sender, instance, **kwargs):
-    if instance.is_completed:
-        course = instance.lesson.course
-        user = instance.student
-        
-        # Check logic: Are all lessons done?
-        total_lessons = course.lessons.count()
-        completed_count = LessonProgress.objects.filter(
-            student=user, lesson__course=course, is_completed=True
-        ).count()
-
-        if total_lessons > 0 and completed_count == total_lessons:
-            # 1. Create Certificate
-            cert, created = Certificate.objects.get_or_create(student=user, course=course)
-
-            # 2. Generate PDF (if new or missing)
-            if created or not cert.pdf_file:
-                pdf_path = generate_certificate_pdf(cert)
-                cert.pdf_file = pdf_path
-                cert.save()
-
-                # 3. Send Email
-                download_link = f"http://127.0.0.1:8000/certificate/{cert.id}/download/"
-                send_mail(
-                    subject=f"🏆 You earned a certificate for {course.title}!",
-                    message=f"Well done, {user.username}!\n\nYour official certificate is ready.\nDownload here: {download_link}",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    fail_silently=True,
-                )
+def _deleted_model(origin):
+    # 'origin' is the instance or queryset whose delete() started the cascade
+    return getattr(origin, 'model', type(origin))
+
+@receiver(post_delete, sender=LessonProgress)
+def remove_course_progress(sender, instance, origin=None, **kwargs):
+    # Cascades from a Lesson/Course delete are handled by a full course rebuild;
+    # a deleted user takes their CourseProgress rows with them
+    if _deleted_model(origin) in (Lesson, Course, get_user_model()):
+        return
+    progress.forget_lesson_progress(instance.student_id, instance.lesson_id, instance.lesson.course_id)
+
+@receiver(pre_save, sender=Lesson)
+def track_lesson_reorder(sender, instance, **kwargs):
+    instance._reordered = False
+    if instance.pk:
+        old_order = Lesson.objects.filter(pk=instance.pk).values_list('order', flat=True).first()
+        instance._reordered = old_order is not None and old_order != instance.order
+
+@receiver(post_save, sender=Lesson)
+def rebuild_progress_on_lesson_change(sender, instance, created, **kwargs):
+    if created or getattr(instance, '_reordered', False):
+        course_id = instance.course_id
+        transaction.on_commit(lambda: progress.rebuild_course_progress(course_id))
+
+@receiver(post_delete, sender=Lesson)
+def rebuild_progress_on_lesson_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_model(origin) is Lesson:
+        course_id = instance.course_id
+        transaction.on_commit(lambda: progress.rebuild_course_progress(course_id))
+
+@receiver(post_save, sender=Enrollment)
+def create_course_progress(sender, instance, created, **kwargs):
+    if created:
+        course_id, student_id = instance.course_id, instance.student_id
+        transaction.on_commit(lambda: progress.rebuild_course_progress(course_id, student_ids=[student_id]))
+
+@receiver(post_delete, sender=Enrollment)
+def delete_course_progress(sender, instance, **kwargs):
+    CourseProgress.objects.filter(student_id=instance.student_id, course_id=instance.course_id).delete()
+
+# --- Signal 4: Course Completion (runs once, after commit, via courses.completion) ---
+from .models import Certificate
+from .certificates import queue_certificate
+from .completion import course_completed, timed
+
+@receiver(course_completed)
+@timed('certificate')
+def issue_certificate(sender, event, **kwargs):
+    cert, created = Certificate.objects.get_or_create(student=event.student, course=event.course)
+
+    # New certificates start PENDING; the render_certificates worker draws the PDF
+    if not created and not cert.pdf_file and cert.status != Certificate.PENDING:
+        queue_certificate(cert)
+
+    event.certificate = cert
+    event.certificate_created = created
+
+@receiver(course_completed)
+@timed('email')
+def send_completion_email(sender, event, **kwargs):
+    # Only the first completion earns an email; re-completing after a toggle stays quiet.
+    # The certificate is still PENDING here (the render_certificates worker draws it)
+    if not event.certificate_created:
+        return
+
+    user, course = event.student, event.course
+    download_link = settings.SITE_URL + reverse('download-cert', args=[event.certificate.id])
+    email_or_notify(
+        user,
+        subject=f"🏆 Course Completed: {course.title}",
+        body=f"Congratulations {user.username}!\n\nYou have finished all lessons in '{course.title}'.\nYour official certificate is being prepared and will be available in a few minutes.\nDownload it here: {download_link}",
+        message=f"🏆 Course completed: {course.title}. Your certificate is being prepared.",
+        link=reverse('download-cert', args=[event.certificate.id]),
+        dedup_key=f"course-completed:{event.certificate.id}",
+    )
+    logger.info("Queued course completion email for certificate %s", event.certificate.id)
+
+# --- Signal 5: Invalidate compiled answer keys when a quiz changes ---
+from .models import Quiz, Question, Answer
+from .grading import bump_quiz_version, bump_quiz_version_for_question
+
+@receiver([post_save, post_delete], sender=Quiz)
+def invalidate_quiz(sender, instance, **kwargs):
+    bump_quiz_version(instance.pk)
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_quiz_for_question(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id)
+
+@receiver([post_save, post_delete], sender=Answer)
+def invalidate_quiz_for_answer(sender, instance, origin=None, **kwargs):
+    # Cascades from a Question/Quiz delete are covered by that row's own signal
+    if _deleted_model(origin) in (Question, Quiz):
+        return
+    bump_quiz_version_for_question(instance.question_id)
+
+# --- Signal 6: Drop cached enrollment sets when enrollments change ---
+from .enrollments import invalidate_enrollments
+
+@receiver(post_save, sender=Enrollment)
+def invalidate_enrollments_on_save(sender, instance, created, **kwargs):
+    if created:
+        invalidate_enrollments(instance.student_id)
+
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollments_on_delete(sender, instance, **kwargs):
+    invalidate_enrollments(instance.student_id)
+
+# --- Signal 7: Keep the course search index in sync ---
+from django.db.models.signals import pre_delete
+from .models import Category
+from .search import schedule_index
+
+@receiver([post_save, post_delete], sender=Course)
+def index_course(sender, instance, **kwargs):
+    schedule_index([instance.pk])
+
+@receiver([post_save, post_delete], sender=Lesson)
+def index_course_for_lesson(sender, instance, **kwargs):
+    schedule_index([instance.course_id])
+
+@receiver(post_save, sender=Category)
+def index_courses_for_category(sender, instance, created, **kwargs):
+    if not created:
+        schedule_index(list(Course.objects.filter(category=instance).values_list('pk', flat=True)))
+
+@receiver(pre_delete, sender=Category)
+def index_courses_for_deleted_category(sender, instance, **kwargs):
+    # Collected before SET_NULL clears the courses' category
+    schedule_index(list(Course.objects.filter(category=instance).values_list('pk', flat=True)))
+
+# --- Signal 8: Lesson/quiz edits count as course changes (conditional GET validators) ---
+from django.utils import timezone
+
+@receiver([post_save, post_delete], sender=Lesson)
+def touch_course_for_lesson(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(updated_at=timezone.now())
+
+@receiver([post_save, post_delete], sender=Quiz)
+def touch_course_for_quiz(sender, instance, **kwargs):
+    now = timezone.now()
+    Lesson.objects.filter(pk=instance.lesson_id).update(updated_at=now)
+    Course.objects.filter(lessons__pk=instance.lesson_id).update(updated_at=now)
+
+# --- Signal 9: Bump catalog cache versions on catalog writes ---
+from . import caching
+
+@receiver([post_save, post_delete], sender=Course)
+def bump_catalog_for_course(sender, instance, **kwargs):
+    caching.bump_catalog()
+    caching.bump_course(instance.pk)
+
+@receiver([post_save, post_delete], sender=Lesson)
+def bump_course_for_lesson(sender, instance, **kwargs):
+    caching.bump_course(instance.course_id)
+
+def _bump_courses_for_lessons(lesson_ids):
+    for course_id in set(Lesson.objects.filter(pk__in=lesson_ids).values_list('course_id', flat=True)):
+        caching.bump_course(course_id)
+
+@receiver([post_save, post_delete], sender=Quiz)
+def bump_course_for_quiz(sender, instance, **kwargs):
+    # The lessons' courses are looked up with one query at commit
+    caching.collect_on_commit(_bump_courses_for_lessons, instance.lesson_id)
+
+@receiver([post_save, post_delete], sender=Category)
+def bump_catalog_for_category(sender, instance, **kwargs):
+    caching.bump_catalog()
+
+# --- Signal 10: Course cards show the instructor's name and avatar ---
+# A change to either touches every course of the instructor, so validators and
+# cached cards move on. Flagged in pre_save, like a role change.
+from users.models import Profile
+
+def _card_changed(model, instance, fields, update_fields):
+    if instance.pk is None or (update_fields is not None and not set(fields) & set(update_fields)):
+        return False
+    old = model.objects.filter(pk=instance.pk).values_list(*fields).first()
+    if old is None:
+        return False
+    new = tuple(model._meta.get_field(field).value_to_string(instance) for field in fields)
+    return tuple(value or '' for value in old) != new
+
+def _touch_instructor_courses(instructor_id):
+    course_ids = list(Course.objects.filter(instructor_id=instructor_id).values_list('pk', flat=True))
+    if not course_ids:
+        return
+    Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
+    caching.bump_catalog()
+    for course_id in course_ids:
+        caching.bump_course(course_id)
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def flag_instructor_name_change(sender, instance, update_fields=None, **kwargs):
+    instance._card_changed = _card_changed(sender, instance, ('username', 'full_name'), update_fields)
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def touch_courses_for_instructor(sender, instance, **kwargs):
+    if getattr(instance, '_card_changed', False):
+        instance._card_changed = False
+        _touch_instructor_courses(instance.pk)
+
+@receiver(pre_save, sender=Profile)
+def flag_instructor_avatar_change(sender, instance, update_fields=None, **kwargs):
+    instance._card_changed = _card_changed(sender, instance, ('avatar',), update_fields)
+
+@receiver(post_save, sender=Profile)
+def touch_courses_for_instructor_avatar(sender, instance, **kwargs):
+    if getattr(instance, '_card_changed', False):
+        instance._card_changed = False
+        _touch_instructor_courses(instance.user_id)
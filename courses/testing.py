@@ -0,0 +1,54 @@
+# courses/testing.py
+"""
+Test data shared by the test suites of every app (courses, users,
+communications). Not imported by application code.
+"""
+from django.contrib.auth import get_user_model
+
+from communications.models import Announcement, Notification
+from . import search
+from .models import Answer, Category, Course, Enrollment, Lesson, LessonProgress, Question, Quiz, QuizAttempt
+
+
+def create_user(username, role='student', **fields):
+    return get_user_model().objects.create_user(username, f'{username}@example.com', 'pw', role=role, **fields)
+
+
+def create_quiz(lesson, title='Quiz', correct='This one', wrong='That one'):
+    """A quiz on `lesson` with one question; returns (quiz, question, correct answer, wrong answer)."""
+    quiz = Quiz.objects.create(lesson=lesson, title=title)
+    question = Question.objects.create(quiz=quiz, text='Which one?')
+    right = Answer.objects.create(question=question, text=correct, is_correct=True)
+    other = Answer.objects.create(question=question, text=wrong)
+    return quiz, question, right, other
+
+
+def add_course(instructor, student, category, number, lessons=3):
+    """A published course of `lessons` lessons, each with a one-question quiz, that `student` is enrolled in and has started."""
+    course = Course.objects.create(
+        title=f'Django {number}', description='REST APIs', instructor=instructor,
+        category=category, price=0, is_published=True,
+    )
+    for order in range(lessons):
+        lesson = Lesson.objects.create(course=course, title=f'Lesson {order}', order=order)
+        quiz, _, _, _ = create_quiz(lesson, title=f'Quiz {order}')
+    Enrollment.objects.create(student=student, course=course)
+    LessonProgress.objects.create(student=student, lesson=lesson, is_completed=True)
+    QuizAttempt.objects.create(user=student, quiz=quiz, score=100, passed=True)
+    Announcement.objects.create(course=course, instructor=instructor, title='Welcome', content='Hi', delivery=Announcement.FEED)
+    Notification.objects.create(user=student, message='Welcome')
+    return course
+
+
+def create_catalog(courses=2, lessons=3):
+    """
+    An instructor, a student enrolled in every course, and `courses`
+    published courses (see add_course). Returns (instructor, student, courses).
+    """
+    instructor = create_user('teacher', role='instructor', full_name='Tea Cher')
+    student = create_user('student', full_name='Stu Dent')
+    category = Category.objects.create(title='Web', slug='web')
+    created = [add_course(instructor, student, category, number, lessons) for number in range(courses)]
+    # Index writes wait for a commit that never comes inside a TestCase
+    search.rebuild_index()
+    return instructor, student, created
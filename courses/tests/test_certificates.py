@@ -0,0 +1,38 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+from pypdf import PdfReader
+
+from courses.utils import render_certificate_pdf
+
+
+class CertificateRenderingTests(SimpleTestCase):
+    def render(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'certificates', 'cert_test.pdf')
+        name = render_certificate_pdf(
+            path, "Jane Doe", "Building REST APIs", timezone.now(), "test-id", "example.com/verify"
+        )
+        self.assertEqual(name, 'certificates/cert_test.pdf')
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['cert_test.pdf'])
+        with open(path, 'rb') as pdf:
+            return pdf.read()
+
+    def test_artwork_and_fields_are_drawn_on_the_page(self):
+        data = self.render()
+        self.assertTrue(data.startswith(b'%PDF'))
+        pages = PdfReader(io.BytesIO(data)).pages
+        self.assertEqual(len(pages), 1)
+        text = pages[0].extract_text()
+        for expected in ('CERTIFICATE OF COMPLETION', 'example.com/verify', 'Jane Doe', 'Building REST APIs', 'test-id'):
+            self.assertIn(expected, text)
+
+    def test_benchmark_reports_time_and_size(self):
+        out = io.StringIO()
+        call_command('benchmark_certificates', count=2, stdout=out)
+        self.assertRegex(out.getvalue(), r'ms/cert, \d+ bytes/cert \(2 certificates\)')
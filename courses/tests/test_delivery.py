@@ -0,0 +1,118 @@
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from courses.models import Category, Certificate, Course, Enrollment, Lesson
+from courses.testing import create_user
+
+PDF = b'%PDF-1.4 certificate ' + b'x' * 100
+
+
+class ProtectedFileTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.media = tempfile.TemporaryDirectory()
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media.name, PROTECTED_FILE_BACKEND='django'))
+        cls.addClassCleanup(cls.media.cleanup)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = create_user('teacher', role='instructor')
+        cls.student = create_user('student')
+        cls.course = Course.objects.create(
+            title='Django', description='REST APIs', instructor=cls.instructor,
+            category=Category.objects.create(title='Web', slug='web'), price=0, is_published=True,
+        )
+        Enrollment.objects.create(student=cls.student, course=cls.course)
+
+
+class CertificateDownloadTests(ProtectedFileTestCase):
+    def setUp(self):
+        self.cert = Certificate.objects.create(student=self.student, course=self.course)
+        self.url = reverse('download-cert', args=[self.cert.pk])
+        self.client.force_login(self.student)
+
+    def make_ready(self):
+        self.cert.pdf_file.save(f'cert_{self.cert.pk}.pdf', ContentFile(PDF), save=False)
+        self.cert.status = Certificate.READY
+        self.cert.save()
+
+    def assertPending(self, response):
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Retry-After'], '5')
+        self.cert.refresh_from_db()
+        self.assertEqual(self.cert.status, Certificate.PENDING)
+
+    def test_not_rendered_yet(self):
+        self.assertPending(self.client.get(self.url))
+
+    def test_failed_render_is_queued_again(self):
+        Certificate.objects.filter(pk=self.cert.pk).update(status=Certificate.FAILED, error='boom')
+        self.assertPending(self.client.get(self.url))
+        self.assertEqual(self.cert.error, '')
+
+    def test_ready_but_missing_from_disk_is_queued_again(self):
+        self.make_ready()
+        os.remove(self.cert.pdf_file.path)
+        self.assertPending(self.client.get(self.url))
+
+    def test_ready(self):
+        self.make_ready()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), PDF)
+
+        revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_range(self):
+        self.make_ready()
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 0-3/{len(PDF)}')
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(suffix.streaming_content), PDF[-5:])
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(PDF)}-').status_code, 416)
+        # A stale If-Range gets the whole file
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-3', HTTP_IF_RANGE='"old"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_someone_else(self):
+        self.make_ready()
+        self.client.force_login(create_user('other'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(PROTECTED_FILE_BACKEND='x-accel-redirect', PROTECTED_FILE_INTERNAL_URL='/protected-media/')
+    def test_front_server_backend(self):
+        self.make_ready()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.cert.pdf_file.name}')
+        self.assertEqual(response.content, b'')
+
+
+class LessonPdfTests(ProtectedFileTestCase):
+    def setUp(self):
+        self.lesson = Lesson.objects.create(course=self.course, title='Intro', order=1)
+        self.lesson.pdf_file.save('intro.pdf', ContentFile(PDF))
+        self.url = reverse('lesson-pdf', args=[self.lesson.pk])
+
+    def test_enrolled_student(self):
+        self.client.force_login(self.student)
+        response = self.client.get(self.url, HTTP_RANGE='bytes=4-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), PDF[4:])
+
+    def test_not_enrolled(self):
+        self.client.force_login(create_user('other'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
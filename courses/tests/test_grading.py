@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from courses import grading
+from courses.models import Answer, Category, Course, Enrollment, Lesson, QuizAttempt
+from courses.testing import create_quiz, create_user
+
+
+class AnswerKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = create_user('teacher', role='instructor')
+        cls.student = create_user('student')
+        course = Course.objects.create(
+            title='Django', description='REST APIs', instructor=instructor,
+            category=Category.objects.create(title='Web', slug='web'), price=0, is_published=True,
+        )
+        lesson = Lesson.objects.create(course=course, title='Intro', order=1)
+        cls.quiz, cls.question, cls.right, cls.other = create_quiz(lesson)
+        Enrollment.objects.create(student=cls.student, course=course)
+
+    def setUp(self):
+        cache.clear()
+        grading._local_keys.clear()
+        self.client.force_login(self.student)
+
+    def take(self, answer):
+        response = self.client.post(reverse('take-quiz', args=[self.quiz.pk]), {f'question_{self.question.pk}': answer.pk})
+        self.assertEqual(response.status_code, 200)
+        return QuizAttempt.objects.filter(user=self.student).latest('id')
+
+    def swap_correct_answer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Answer.objects.filter(pk=self.right.pk).update(is_correct=False)
+            self.other.is_correct = True
+            self.other.save()
+
+    def test_key_is_compiled_once(self):
+        key = grading.get_answer_key(self.quiz.pk)
+        self.assertEqual(key.correct, {self.question.pk: frozenset([self.right.pk])})
+        with self.assertNumQueries(0):
+            self.assertIs(grading.get_answer_key(self.quiz.pk), key)
+
+    def test_grades(self):
+        attempt = self.take(self.right)
+        self.assertEqual((attempt.score, attempt.passed), (100, True))
+        self.assertEqual(grading.unpack_responses(attempt.responses), [self.right.pk])
+        attempt = self.take(self.other)
+        self.assertEqual((attempt.score, attempt.passed), (0, False))
+
+    def test_edit_after_the_key_is_cached(self):
+        self.take(self.right)
+        self.swap_correct_answer()
+        attempt = self.take(self.right)
+        self.assertEqual((attempt.score, attempt.passed), (0, False))
+        self.assertEqual(self.take(self.other).score, 100)
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_edit_after_the_key_is_cached_in_a_shared_cache(self):
+        self.take(self.right)
+        # Another process: only the shared cache is left
+        grading._local_keys.clear()
+        with self.assertNumQueries(0):
+            grading.get_answer_key(self.quiz.pk)
+
+        self.swap_correct_answer()
+        self.assertEqual(self.take(self.right).score, 0)
+        self.assertEqual(self.take(self.other).score, 100)
+
+    def test_answer_outside_the_quiz_is_not_recorded(self):
+        lesson = Lesson.objects.create(course=self.quiz.lesson.course, title='Next', order=2)
+        _, _, stranger, _ = create_quiz(lesson, title='Other quiz')
+        attempt = self.take(stranger)
+        self.assertEqual(attempt.score, 0)
+        self.assertEqual(grading.unpack_responses(attempt.responses), [])
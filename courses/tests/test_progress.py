@@ -0,0 +1,80 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from courses.models import Category, Course, CourseProgress, Enrollment, Lesson, LessonProgress
+from courses.progress import rebuild_course_progress
+from courses.testing import create_user
+
+
+class CourseProgressTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = create_user('teacher', role='instructor')
+        cls.student = create_user('student')
+        cls.course = Course.objects.create(
+            title='Django', description='REST APIs', instructor=cls.instructor,
+            category=Category.objects.create(title='Web', slug='web'), price=0, is_published=True,
+        )
+        cls.lessons = [Lesson.objects.create(course=cls.course, title=f'Lesson {order}', order=order) for order in range(1, 5)]
+        Enrollment.objects.create(student=cls.student, course=cls.course)
+
+    def complete(self, *lessons):
+        for lesson in lessons:
+            LessonProgress.objects.create(student=self.student, lesson=lesson, is_completed=True)
+
+    def record(self):
+        return CourseProgress.objects.get(student=self.student, course=self.course)
+
+    def test_toggles_update_the_record(self):
+        self.complete(self.lessons[0], self.lessons[1])
+        record = self.record()
+        self.assertEqual(record.completed_lessons, 2)
+        self.assertEqual(record.percent, 50)
+        self.assertEqual(record.resume_lesson, self.lessons[2])
+        self.assertIsNone(record.completed_at)
+
+        self.complete(self.lessons[2], self.lessons[3])
+        record = self.record()
+        self.assertTrue(record.is_complete)
+        self.assertIsNone(record.resume_lesson)
+        self.assertIsNotNone(record.completed_at)
+
+    def test_deleting_lesson_progress_takes_it_off(self):
+        self.complete(self.lessons[0], self.lessons[1])
+        LessonProgress.objects.get(student=self.student, lesson=self.lessons[0]).delete()
+        record = self.record()
+        self.assertEqual(record.completed_lesson_ids, [self.lessons[1].pk])
+        self.assertEqual(record.resume_lesson, self.lessons[0])
+
+    def test_rebuild_matches_lesson_progress(self):
+        self.complete(self.lessons[0])
+        CourseProgress.objects.filter(student=self.student).update(completed_lesson_ids=[], completed_lessons=0, percent=0)
+        # A new first lesson changes the order and the total
+        first = Lesson.objects.create(course=self.course, title='Intro', order=0)
+
+        self.assertEqual(rebuild_course_progress(self.course.pk), 1)
+        record = self.record()
+        self.assertEqual(record.completed_lesson_ids, [self.lessons[0].pk])
+        self.assertEqual(record.total_lessons, 5)
+        self.assertEqual(record.percent, 20)
+        self.assertEqual(record.resume_lesson, first)
+
+    def test_full_rebuild_drops_students_no_longer_enrolled(self):
+        self.complete(self.lessons[0])
+        Enrollment.objects.filter(student=self.student).delete()
+        self.assertFalse(CourseProgress.objects.filter(student=self.student).exists())
+        rebuild_course_progress(self.course.pk)
+        self.assertFalse(CourseProgress.objects.filter(student=self.student).exists())
+
+    def test_deleting_a_student_with_progress(self):
+        self.complete(self.lessons[0], self.lessons[1])
+        self.student.delete()
+        self.assertFalse(CourseProgress.objects.exists())
+        self.assertFalse(LessonProgress.objects.exists())
+
+    def test_instructor_sees_their_own_progress(self):
+        LessonProgress.objects.create(student=self.instructor, lesson=self.lessons[0], is_completed=True)
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse('course-detail', args=[self.course.pk]))
+        self.assertEqual(response.context['progress'], 25)
+        self.assertEqual(response.context['next_lesson'], self.lessons[1])
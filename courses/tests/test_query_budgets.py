@@ -0,0 +1,167 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from courses.models import Lesson, LessonProgress, Quiz, QuizAttempt
+from courses.querycount import QueryBudgetTestMixin
+from courses.testing import add_course, create_catalog, create_user
+
+
+class PageQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Every budgeted course page, on a cold cache, for each kind of visitor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor, cls.student, cls.courses = create_catalog()
+        cls.course = cls.courses[0]
+        cls.quiz = Quiz.objects.filter(lesson__course=cls.course).first()
+        cls.question = cls.quiz.questions.get()
+        cls.answer = cls.question.answers.get(is_correct=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, *args):
+        cache.clear()
+        response = self.client.get(reverse(name, args=args))
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryBudget(response)
+        return response
+
+    def test_anonymous(self):
+        self.get('course-list')
+        self.get('course-detail', self.course.pk)
+
+    def test_student(self):
+        self.client.force_login(self.student)
+        self.get('course-list')
+        self.get('course-detail', self.course.pk)
+        self.get('take-quiz', self.quiz.pk)
+
+    def test_instructor(self):
+        self.client.force_login(self.instructor)
+        self.get('course-list')
+        self.get('course-detail', self.course.pk)
+        self.get('take-quiz', self.quiz.pk)
+
+    def test_quiz_submission(self):
+        self.client.force_login(self.student)
+        response = self.client.post(
+            reverse('take-quiz', args=[self.quiz.pk]), {f'question_{self.question.pk}': self.answer.pk},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryBudget(response)
+        self.assertTrue(QuizAttempt.objects.filter(user=self.student, quiz=self.quiz, score=100).exists())
+
+    def test_quiz_submission_needs_enrollment(self):
+        outsider = create_user('outsider')
+        self.client.force_login(outsider)
+        response = self.client.post(
+            reverse('take-quiz', args=[self.quiz.pk]), {f'question_{self.question.pk}': self.answer.pk},
+        )
+        self.assertRedirects(response, reverse('course-detail', args=[self.course.pk]), fetch_redirect_response=False)
+        self.assertFalse(QuizAttempt.objects.filter(user=outsider).exists())
+
+
+class ApiQueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    """Every budgeted API endpoint, on a cold cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor, cls.student, cls.courses = create_catalog()
+        cls.course = cls.courses[0]
+        cls.lesson = cls.course.lessons.first()
+        cls.quiz = cls.lesson.quiz
+
+    def get(self, name, *args, query=''):
+        cache.clear()
+        response = self.client.get(reverse(name, args=args) + query)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        self.assertQueryBudget(response)
+        return response
+
+    def check_catalog(self):
+        self.get('api-course-list')
+        self.get('api-course-detail', self.course.pk)
+        self.get('api-course-search', query='?q=django')
+        self.get('api-course-facets')
+        self.get('api-course-outline', self.course.pk)
+        self.get('api-category-list')
+        self.get('api-lesson-list')
+
+    def check_learning(self):
+        self.get('api-lesson-detail', self.lesson.pk)
+        self.get('api-quiz-list')
+        self.get('api-quiz-detail', self.quiz.pk)
+        self.get('api-quiz-paper', self.quiz.pk)
+        self.get('api-enrollment-list')
+        self.get('api-quiz-attempt-list')
+
+    def test_anonymous(self):
+        self.check_catalog()
+
+    def test_student(self):
+        self.client.force_authenticate(self.student)
+        self.check_catalog()
+        self.check_learning()
+
+    def test_instructor(self):
+        self.client.force_authenticate(self.instructor)
+        self.check_catalog()
+        self.check_learning()
+
+
+class QueryCountScalingTests(TestCase):
+    """
+    The catalog and course pages run the same number of queries for one
+    course (or lesson) as for many: no query per row.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor, cls.student, (cls.course,) = create_catalog(courses=1, lessons=1)
+
+    def setUp(self):
+        self.client.force_login(self.student)
+
+    def count(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def assertConstant(self, url, grow):
+        single = self.count(url)
+        grow()
+        cache.clear()
+        with self.assertNumQueries(single):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def add_courses(self):
+        for number in range(1, 6):
+            add_course(self.instructor, self.student, self.course.category, number, lessons=4)
+
+    def add_lessons(self):
+        for order in range(1, 8):
+            lesson = Lesson.objects.create(course=self.course, title=f'Lesson {order}', order=order)
+            quiz = Quiz.objects.create(lesson=lesson, title=f'Quiz {order}')
+            # All completed, so the course stays complete (and shows its certificate) as with one lesson
+            LessonProgress.objects.create(student=self.student, lesson=lesson, is_completed=True)
+            QuizAttempt.objects.create(user=self.student, quiz=quiz, score=50, passed=False)
+
+    def test_course_list(self):
+        self.assertConstant(reverse('course-list'), self.add_courses)
+
+    def test_course_detail(self):
+        self.assertConstant(reverse('course-detail', args=[self.course.pk]), self.add_lessons)
+
+    def test_api_course_list(self):
+        self.client.logout()
+        self.assertConstant(reverse('api-course-list'), self.add_courses)
+
+    def test_api_lesson_list(self):
+        self.client.logout()
+        self.assertConstant(reverse('api-lesson-list'), self.add_lessons)
@@ -0,0 +1,83 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from courses.models import Category, Course, Lesson, Question, Quiz
+from courses.testing import create_user
+
+VALID_CSV = """question,option_1,option_2,option_3,correct
+What is 2 + 2?,3,4,5,2
+Which is a web framework?,Django,NumPy,,1
+"""
+
+INVALID_CSV = """question,option_1,option_2,correct,order
+Fine question,A,B,1,
+,A,B,1,
+Only one option,A,,1,
+Out of range,A,B,3,
+Bad order,A,B,1,-2
+"""
+
+
+class QuizImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = create_user('teacher', role='instructor')
+        course = Course.objects.create(
+            title='Django', description='REST APIs', instructor=cls.instructor,
+            category=Category.objects.create(title='Web', slug='web'), price=0, is_published=True,
+        )
+        cls.quiz = Quiz.objects.create(lesson=Lesson.objects.create(course=course, title='Intro', order=1), title='Quiz')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+    def upload(self, text, name='bank.csv', **data):
+        return self.client.post(
+            reverse('api-quiz-import-questions', args=[self.quiz.pk]),
+            {'file': SimpleUploadedFile(name, text.encode()), **data}, format='multipart',
+        )
+
+    def test_csv(self):
+        response = self.upload(VALID_CSV)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+
+        questions = list(Question.objects.filter(quiz=self.quiz).order_by('order'))
+        self.assertEqual([question.text for question in questions], ['What is 2 + 2?', 'Which is a web framework?'])
+        self.assertEqual([question.order for question in questions], [1, 2])
+        self.assertEqual(
+            [(answer.text, answer.is_correct) for answer in questions[0].answers.order_by('id')],
+            [('3', False), ('4', True), ('5', False)],
+        )
+        # The blank third option is dropped
+        self.assertEqual(questions[1].answers.count(), 2)
+
+    def test_every_invalid_row_is_reported_and_nothing_is_written(self):
+        response = self.upload(INVALID_CSV)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['created'], 0)
+        errors = {error['row']: error['error'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5])
+        self.assertIn("Question text is required.", errors[2])
+        self.assertIn("At least 2 options are required.", errors[3])
+        self.assertIn("'correct' must be between 1 and 2.", errors[4])
+        self.assertIn("'order' must be a positive whole number.", errors[5])
+        self.assertFalse(Question.objects.filter(quiz=self.quiz).exists())
+
+    def test_replace(self):
+        self.upload(VALID_CSV)
+        response = self.upload("question,option_1,option_2,correct\nNew,A,B,2\n", mode='replace')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(list(Question.objects.filter(quiz=self.quiz).values_list('text', flat=True)), ['New'])
+
+    def test_unparseable_json(self):
+        response = self.upload('{"questions": [', name='bank.json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['row'], 0)
+
+    def test_only_the_course_instructor(self):
+        self.client.force_authenticate(create_user('other', role='instructor'))
+        self.assertEqual(self.upload(VALID_CSV).status_code, 403)
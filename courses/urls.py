@@ -3,7 +3,7 @@ from .views import (
     CourseListView, CourseDetailView, 
     CourseCreateView, CourseUpdateView, CourseDeleteView,
     LessonCreateView, 
-    toggle_lesson_completion, QuizCreateView, add_question, take_quiz, download_certificate, verify_certificate
+    toggle_lesson_completion, lesson_pdf, QuizCreateView, add_question, take_quiz, download_certificate, verify_certificate
 )
 
 urlpatterns = [
@@ -19,6 +19,7 @@ urlpatterns = [
     # Lesson Actions
     path('<int:course_id>/add-lesson/', LessonCreateView.as_view(), name='lesson-add'),
     path('lesson/<int:lesson_id>/toggle/', toggle_lesson_completion, name='lesson-toggle'),
+    path('lesson/<int:lesson_id>/pdf/', lesson_pdf, name='lesson-pdf'),
 
     path('quiz/<int:pk>/take/', take_quiz, name='take-quiz'),
 
@@ -4,85 +4,142 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.lib.colors import HexColor
 from reportlab.lib.utils import ImageReader
+from urllib.parse import urlsplit
 from django.conf import settings
+from django.urls import reverse
+
+# Bump when the certificate artwork below changes; already rendered PDFs
+# from older versions are then considered stale.
+CERTIFICATE_TEMPLATE_VERSION = 1
+
+PAGE_SIZE = landscape(letter)
+
+# --- COLORS ---
+NAVY_BLUE = HexColor('#003366')
+GOLD_COLOR = HexColor('#C5B358')
+
+
+def certificate_render_args(certificate):
+    """
+    Plain, picklable arguments for render_certificate_pdf, so rendering can
+    run in a worker process without touching the database.
+    """
+    filename = f"cert_{certificate.id}.pdf"
+    return {
+        'file_path': os.path.join(settings.MEDIA_ROOT, 'certificates', filename),
+        'student_name': certificate.student.full_name or certificate.student.username,
+        'course_title': certificate.course.title,
+        'issued_at': certificate.issued_at,
+        'certificate_id': str(certificate.id),
+        'verify_url': certificate_verify_url(),
+        'template_version': CERTIFICATE_TEMPLATE_VERSION,
+    }
+
+def certificate_verify_url():
+    """Printed on the certificate, e.g. 'app.apilearn.com/courses/certificate/verify'."""
+    return urlsplit(settings.SITE_URL).netloc + reverse('verify-cert')
 
 def generate_certificate_pdf(certificate):
     """
     Generates a premium-style PDF certificate.
     """
-    filename = f"cert_{certificate.id}.pdf"
-    file_path = os.path.join(settings.MEDIA_ROOT, 'certificates', filename)
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return render_certificate_pdf(**certificate_render_args(certificate))
 
-    # Setup Canvas (Landscape)
-    c = canvas.Canvas(file_path, pagesize=landscape(letter))
-    width, height = landscape(letter)
-    
-    # --- COLORS ---
-    navy_blue = HexColor('#003366')
-    gold_color = HexColor('#C5B358')
+
+def draw_certificate_static(c, verify_url):
+    """
+    Everything that is identical on every certificate: borders, header,
+    separator, footer labels and the seal.
+    """
+    width, height = PAGE_SIZE
 
     # --- BORDERS ---
     # Outer Border (Navy)
-    c.setStrokeColor(navy_blue)
+    c.setStrokeColor(NAVY_BLUE)
     c.setLineWidth(10)
     c.rect(20, 20, width-40, height-40)
 
     # Inner Border (Gold)
-    c.setStrokeColor(gold_color)
+    c.setStrokeColor(GOLD_COLOR)
     c.setLineWidth(3)
     c.rect(35, 35, width-70, height-70)
 
     # --- HEADER ---
-    c.setFillColor(navy_blue)
+    c.setFillColor(NAVY_BLUE)
     c.setFont("Times-Bold", 40)
     c.drawCentredString(width / 2, height - 120, "CERTIFICATE OF COMPLETION")
 
-    c.setFillColor(gold_color)
+    c.setFillColor(GOLD_COLOR)
     c.setFont("Times-Roman", 16)
     c.drawCentredString(width / 2, height - 150, "THIS CERTIFIES THAT")
 
-    # --- STUDENT NAME (Big & Fancy) ---
-    student_name = certificate.student.full_name or certificate.student.username
-    c.setFillColor(HexColor('#000000')) 
-    c.setFont("Times-BoldItalic", 45)
-    c.drawCentredString(width / 2, height - 230, student_name)
-
     # --- SEPARATOR LINE ---
-    c.setStrokeColor(navy_blue)
+    c.setStrokeColor(NAVY_BLUE)
     c.setLineWidth(1)
     c.line(width/2 - 150, height - 245, width/2 + 150, height - 245)
 
     # --- COURSE DETAILS ---
+    c.setFillColor(HexColor('#000000'))
     c.setFont("Times-Roman", 18)
     c.drawCentredString(width / 2, height - 280, "Has successfully demonstrated proficiency in")
-    
-    c.setFillColor(navy_blue)
-    c.setFont("Times-Bold", 30)
-    c.drawCentredString(width / 2, height - 330, certificate.course.title)
 
     # --- FOOTER / VERIFICATION ---
     c.setFillColor(HexColor('#555555'))
-    c.setFont("Courier", 12) # Courier for the code (looks techy)
-    
-    # Left Side: Date
-    date_str = certificate.issued_at.strftime("%B %d, %Y")
-    c.drawString(60, 80, f"Date Issued: {date_str}")
     c.line(60, 95, 200, 95) # Signature Line
-
-    # Right Side: Verification Code
-    c.drawRightString(width - 60, 80, f"ID: {str(certificate.id)}")
     c.setFont("Times-Italic", 10)
-    c.drawRightString(width - 60, 65, "Verify at: app.apilearn.com/courses/certificate/verify")
+    c.drawRightString(width - 60, 65, f"Verify at: {verify_url}")
 
     # --- FAKE DIGITAL SEAL (Bottom Center) ---
-    c.setStrokeColor(gold_color)
+    c.setStrokeColor(GOLD_COLOR)
     c.setLineWidth(3)
     c.circle(width/2, 85, 40)
-    c.setFillColor(gold_color)
+    c.setFillColor(GOLD_COLOR)
     c.setFont("Times-Bold", 10)
     c.drawCentredString(width/2, 90, "OFFICIAL")
     c.drawCentredString(width/2, 78, "SEAL")
 
+
+def draw_certificate_fields(c, student_name, course_title, issued_at, certificate_id):
+    """The per-certificate text stamped on top of the static artwork."""
+    width, height = PAGE_SIZE
+
+    # --- STUDENT NAME (Big & Fancy) ---
+    c.setFillColor(HexColor('#000000'))
+    c.setFont("Times-BoldItalic", 45)
+    c.drawCentredString(width / 2, height - 230, student_name)
+
+    # --- COURSE TITLE ---
+    c.setFillColor(NAVY_BLUE)
+    c.setFont("Times-Bold", 30)
+    c.drawCentredString(width / 2, height - 330, course_title)
+
+    c.setFillColor(HexColor('#555555'))
+    c.setFont("Courier", 12) # Courier for the code (looks techy)
+
+    # Left Side: Date
+    date_str = issued_at.strftime("%B %d, %Y")
+    c.drawString(60, 80, f"Date Issued: {date_str}")
+
+    # Right Side: Verification Code
+    c.drawRightString(width - 60, 80, f"ID: {certificate_id}")
+
+
+def render_certificate_pdf(file_path, student_name, course_title, issued_at, certificate_id, verify_url,
+                           template_version=CERTIFICATE_TEMPLATE_VERSION):
+    """
+    Draws the certificate to file_path and returns its MEDIA-relative path.
+    The file is written next to its destination and moved into place, so
+    readers never see a half-written PDF. `template_version` is recorded by
+    the caller; the artwork drawn is always the current one.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+
+    # Setup Canvas (Landscape)
+    c = canvas.Canvas(tmp_path, pagesize=PAGE_SIZE)
+    draw_certificate_static(c, verify_url)
+    draw_certificate_fields(c, student_name, course_title, issued_at, certificate_id)
+
     c.save()
-    return f"certificates/{filename}"
\ No newline at end of file
+    os.replace(tmp_path, file_path)
+    return f"certificates/{os.path.basename(file_path)}"
@@ -8,17 +8,19 @@ from django.urls import reverse
 # Models
 from .models import Payment
 from courses.models import Course, Enrollment
+from courses.enrollments import is_enrolled
 from .paystack import Paystack
 
 # Emails
-from django.core.mail import send_mail
+from django.db import transaction
+from communications.outbox import enqueue_email
 
 @login_required
 def initiate_payment(request, course_id):
     course = get_object_or_404(Course, pk=course_id)
     
     # 1. Check if already enrolled
-    if Enrollment.objects.filter(student=request.user, course=course).exists():
+    if is_enrolled(request.user, course):
         messages.info(request, "You are already enrolled!")
         return redirect('course-detail', pk=course.id)
 
@@ -89,21 +91,22 @@ def verify_payment(request):
     response = paystack.verify_transaction(ref)
 
     if response['status'] and response['data']['status'] == 'success':
-        # 1. Update Payment Status
-        payment.status = Payment.SUCCESS
-        payment.save()
-        
-        # 2. Create Enrollment
-        Enrollment.objects.get_or_create(student=payment.user, course=payment.course)
-        
-        # 3. Send Email
-        send_mail(
-            subject=f"Payment Receipt: {payment.course.title}",
-            message=f"Payment Received: ${payment.amount}\nReference: {payment.reference}\n\nAccess your course now!",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[payment.user.email],
-            fail_silently=True
-        )
+        # Payment, enrollment and receipt are committed together
+        with transaction.atomic():
+            # 1. Update Payment Status
+            payment.status = Payment.SUCCESS
+            payment.save()
+
+            # 2. Create Enrollment
+            Enrollment.objects.get_or_create(student=payment.user, course=payment.course)
+
+            # 3. Queue Email (a refreshed callback page doesn't send a second receipt)
+            enqueue_email(
+                subject=f"Payment Receipt: {payment.course.title}",
+                body=f"Payment Received: ${payment.amount}\nReference: {payment.reference}\n\nAccess your course now!",
+                to=payment.user.email,
+                dedup_key=f"payment-receipt:{payment.reference}",
+            )
 
         # Make sure this template exists: templates/payments/payment_success.html
         return render(request, 'payments/payment_success.html', {'payment': payment, 'course': payment.course})
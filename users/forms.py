@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -28,4 +29,14 @@ class ProfileUpdateForm(forms.ModelForm):
     
     class Meta:
         model = Profile
-        fields = ['avatar', 'bio'] # We handle full_name manually in the view
\ No newline at end of file
+        fields = ['avatar', 'bio', 'email_digest'] # We handle full_name manually in the view
+        labels = {'email_digest': 'Notification emails'}
+
+    def save(self, commit=True):
+        profile = super().save(commit=False)
+        # Switching to a digest: it starts from now, not from everything already emailed
+        if self.initial.get('email_digest') == Profile.IMMEDIATE and profile.wants_digest:
+            profile.digest_sent_at = timezone.now()
+        if commit:
+            profile.save()
+        return profile
\ No newline at end of file
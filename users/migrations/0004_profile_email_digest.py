@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_remove_profile_created_at_remove_profile_full_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='digest_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='email_digest',
+            field=models.CharField(choices=[('immediate', 'Email me right away'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], default='immediate', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['email_digest', 'user'], name='profile_digest_idx'),
+        ),
+    ]
@@ -24,11 +24,33 @@ class User(AbstractUser):
 
 # Signal to auto-create Profile (Keep this if you have other profile fields like avatar)
 class Profile(models.Model):
+    # How notification emails reach the user: one per event, or bundled by
+    # the send_digests command (communications/digests.py)
+    IMMEDIATE = 'immediate'
+    HOURLY = 'hourly'
+    DAILY = 'daily'
+
+    DIGEST_CHOICES = (
+        (IMMEDIATE, 'Email me right away'),
+        (HOURLY, 'Hourly digest'),
+        (DAILY, 'Daily digest'),
+    )
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
     bio = models.TextField(blank=True)
+    email_digest = models.CharField(max_length=10, choices=DIGEST_CHOICES, default=IMMEDIATE)
+    # End of the last digest window; the next digest covers what came after it
+    digest_sent_at = models.DateTimeField(blank=True, null=True)
     
     # Copy full_name here automatically if needed, or just rely on User.full_name
+
+    class Meta:
+        indexes = [models.Index(fields=['email_digest', 'user'], name='profile_digest_idx')]
+
+    @property
+    def wants_digest(self):
+        return self.email_digest != self.IMMEDIATE
     
     def __str__(self):
         return f"Profile of {self.user.username}"
\ No newline at end of file
@@ -1,9 +1,12 @@
+import logging
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from .models import Profile
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -14,27 +17,28 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
 
-from django.core.mail import send_mail
-from django.conf import settings
 from django.db.models.signals import pre_save
+from communications.outbox import enqueue_email
 
 @receiver(pre_save, sender=User)
 def check_role_change(sender, instance, **kwargs):
     """
-    Detects if the role is changing. If so, sends an email notification.
+    Detects if the role is changing. If so, flags the user so the email is
+    queued once the save has gone through.
     """
+    instance._role_changed = False
     if instance.pk: # If user already exists (not a new creation)
-        try:
-            old_user = User.objects.get(pk=instance.pk)
-            if old_user.role != instance.role:
-                # Role has changed!
-                send_mail(
-                    subject="Role Update Notification",
-                    message=f"Hello {instance.username},\n\nYour account role has been updated to: {instance.get_role_display()}.\n\nRegards,\nApiLearn Team",
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[instance.email],
-                    fail_silently=False,
-                )
-                print(f"📧 EMAIL SENT: Role changed for {instance.email} to {instance.role}")
-        except User.DoesNotExist:
-            pass
\ No newline at end of file
+        old_role = User.objects.filter(pk=instance.pk).values_list('role', flat=True).first()
+        instance._role_changed = old_role is not None and old_role != instance.role
+
+@receiver(post_save, sender=User)
+def queue_role_change_email(sender, instance, **kwargs):
+    if not getattr(instance, '_role_changed', False):
+        return
+    instance._role_changed = False
+    enqueue_email(
+        subject="Role Update Notification",
+        body=f"Hello {instance.username},\n\nYour account role has been updated to: {instance.get_role_display()}.\n\nRegards,\nApiLearn Team",
+        to=instance.email,
+    )
+    logger.info("Queued role change email for user %s (now %s)", instance.pk, instance.role)
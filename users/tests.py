@@ -1,3 +1,30 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from courses.querycount import QueryBudgetTestMixin
+from courses.testing import create_catalog
+
+
+class DashboardQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """The dashboards stay within their budgets on a cold cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor, cls.student, _ = create_catalog()
+
+    def get(self, name):
+        cache.clear()
+        response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryBudget(response)
+        return response
+
+    def test_student_dashboard(self):
+        self.client.force_login(self.student)
+        self.get('student-dashboard')
+
+    def test_instructor_dashboard(self):
+        self.client.force_login(self.instructor)
+        self.get('instructor-dashboard')
+        self.get('student-dashboard')
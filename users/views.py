@@ -5,7 +5,8 @@ from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.core.mail import EmailMessage
+from django.db import transaction
+from communications.outbox import enqueue_email
 from django.contrib.auth.tokens import default_token_generator
 from .forms import UserRegistrationForm
 from django.contrib.auth.decorators import login_required
@@ -23,26 +24,27 @@ def register(request):
             # 1. Create user but DO NOT save to DB yet (to set is_active=False)
             user = form.save(commit=False)
             user.is_active = False # Deactivate until email verified
-            user.save()
 
-            # 2. Prepare Email Data
-            current_site = get_current_site(request)
-            mail_subject = 'Activate your ApiLearn Account'
-            
-            # Render the email body from a template
-            message = render_to_string('users/activation_email_body.html', {
-                'user': user,
-                'domain': current_site.domain,
-                'uid': urlsafe_base64_encode(force_bytes(user.pk)),
-                'token': default_token_generator.make_token(user),
-                'protocol': 'https' if request.is_secure() else 'http'
-            })
-
-            # 3. Send Email
-            to_email = form.cleaned_data.get('email')
-            email = EmailMessage(mail_subject, message, to=[to_email])
-            email.content_subtype = "html" # Main content is text/html
-            email.send()
+            # The account and its activation email are committed together
+            with transaction.atomic():
+                user.save()
+
+                # 2. Prepare Email Data
+                current_site = get_current_site(request)
+                mail_subject = 'Activate your ApiLearn Account'
+
+                # Render the email body from a template
+                message = render_to_string('users/activation_email_body.html', {
+                    'user': user,
+                    'domain': current_site.domain,
+                    'uid': urlsafe_base64_encode(force_bytes(user.pk)),
+                    'token': default_token_generator.make_token(user),
+                    'protocol': 'https' if request.is_secure() else 'http'
+                })
+
+                # 3. Queue Email (sent by the send_outbox_emails worker)
+                to_email = form.cleaned_data.get('email')
+                enqueue_email(mail_subject, message, to_email, is_html=True)  # Main content is text/html
 
             # 4. Redirect to "Check Email" page
             return render(request, 'users/email_sent.html')
@@ -84,8 +86,9 @@ def activate_account(request, uidb64, token):
         return render(request, 'users/activation_result.html', {'success': False})
 
 
-from django.db.models import Sum, Count
-from courses.models import Course, Enrollment, Certificate
+from django.db.models import Sum, Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from courses.models import Course, Enrollment, Certificate, Lesson
 from payments.models import Payment
 
 @login_required
@@ -99,11 +102,12 @@ def dashboard(request):
 
 @login_required
 def student_dashboard(request):
+    """Two queries however many courses: enrollments with course + category, certificates with course."""
     # 1. Get My Courses
-    enrollments = Enrollment.objects.filter(student=request.user).select_related('course')
+    enrollments = Enrollment.objects.filter(student=request.user).select_related('course__category')
     
     # 2. Get My Certificates
-    certificates = Certificate.objects.filter(student=request.user)
+    certificates = Certificate.objects.filter(student=request.user).select_related('course')
     
     context = {
         'enrollments': enrollments,
@@ -111,18 +115,32 @@ def student_dashboard(request):
     }
     return render(request, 'dashboard/student_dashboard.html', context)
 
+def _count_per_course(model):
+    counts = model.objects.filter(course=OuterRef('pk')).order_by().values('course').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
 @login_required
 def instructor_dashboard(request):
+    """Two queries however many courses: annotated course list and the earnings sum."""
     # Security: Ensure only instructors can see this
     if request.user.role != 'instructor':
         return redirect('student-dashboard')
 
-    # 1. Get My Courses
-    courses = Course.objects.filter(instructor=request.user)
+    # 1. Get My Courses, with lesson/student counts as correlated subqueries
+    # (two plain JOIN + COUNTs would multiply lessons by enrollments)
+    courses = list(
+        Course.objects.filter(instructor=request.user)
+        .select_related('category')
+        .annotate(
+            lesson_count=_count_per_course(Lesson),
+            student_count=_count_per_course(Enrollment),
+        )
+        .order_by('-created_at')
+    )
     
-    # 2. Calculate Stats
-    total_students = Enrollment.objects.filter(course__instructor=request.user).count()
-    total_courses = courses.count()
+    # 2. Calculate Stats (from the rows above; only earnings needs another query)
+    total_students = sum(course.student_count for course in courses)
+    total_courses = len(courses)
     
     # Calculate Earnings (Sum of successful payments for my courses)
     earnings_data = Payment.objects.filter(